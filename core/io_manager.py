@@ -1,6 +1,10 @@
 from pathlib import Path
 import json
 import re
+try:
+    import orjson  # 可选：更快的 JSON 解析
+except ImportError:
+    orjson = None
 
 class IO_Manager:
     def __init__(self, config_directory: str = r"C:\config"):
@@ -59,6 +63,23 @@ class IO_Manager:
         # print(f"读取 JSON 文件完成: {abs_path}, 字符数: {len(content)}")  # 调试：确认读取内容长度
         return content
 
+    def read_json_object(self, relative_path: str):
+        """
+        zh: 读取 JSON 文件并直接解析为 Python 对象；仅校验扩展名为 .json。
+            以带缓冲的二进制方式一次解析完成，省去先构造文本再 json.loads 的第二遍处理。
+        en: Read a JSON file and parse it directly into a Python object; validates extension is .json only.
+            Parses in a single pass from a buffered binary stream instead of building the text first.
+        """
+        abs_path = self._build_absolute_path(relative_path)
+        if Path(abs_path).suffix.lower() != ".json":
+            raise ValueError(
+                f"文件类型不匹配：期望扩展名为 '.json'，实际为 '{Path(abs_path).suffix}'；请提供 JSON 文件路径。"
+            )
+        with open(abs_path, "rb", buffering=65536) as f:
+            obj = orjson.loads(f.read()) if orjson is not None else json.load(f)
+        # print(f"解析 JSON 文件完成: {abs_path}, 类型: {type(obj).__name__}")  # 调试：确认解析结果类型
+        return obj
+
     def read_yaml(self, relative_path: str) -> str:
         """
         zh: 读取 YAML 文件并原样返回文本内容；仅校验扩展名为 .yaml 或 .yml。
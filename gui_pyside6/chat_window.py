@@ -1,12 +1,14 @@
-from queue import Queue, Empty
+from collections import deque
 from PySide6.QtWidgets import QWidget, QHBoxLayout, QFrame, QVBoxLayout, QScrollArea, QTextEdit, QToolButton, QLabel, QSizePolicy, QProgressBar, QStackedWidget, QPushButton, QDialog, QLineEdit, QMessageBox
-from PySide6.QtCore import Qt, QThread, Signal, QTimer
+from PySide6.QtCore import Qt, QThread, Signal, QTimer, QSignalBlocker
 from PySide6.QtWidgets import QApplication
-from PySide6.QtGui import QIcon, QTextCursor
+from PySide6.QtGui import QIcon, QTextCursor, QTextDocumentFragment
 from pathlib import Path
+from functools import partial, lru_cache
 import sys
 import os
 import json
+import threading
 import traceback  # 新增：用于捕获并格式化堆栈信息
 
 from core.message_process import create_default_chat_data
@@ -15,6 +17,63 @@ from core.variables_update import VariableManager
 from core.variables_loader import load_variables_from_json
 from core.io_manager import global_io_manager
 
+# 统一错误入口的固定说明文本（模块级常量，出错时不再重复拼接）
+_BLANK_ERROR_TEXT = (
+    "发生错误，但未提供任何错误信息；原因：错误消息为空或仅空白；"
+    "期望：传入清晰、具体的错误说明文本。"
+)
+_UNKNOWN_ERROR_TEXT = (
+    "发生未知错误（未提供错误详情）；原因：错误消息为空或无法转为字符串；"
+    "期望：提供清晰、具体的错误说明文本以便排查。"
+)
+_TERSE_ERROR_SUFFIX = (
+    " 未提供错误详情；原因：异常消息为空或未格式化；"
+    "期望：包含异常类型名与详细说明（例如 ValueError: 参数 x 不合法）。"
+)
+# 仅有笼统字样、需要补充说明的错误消息
+_TERSE_ERRORS = frozenset({"发生错误", "错误", "Error", "ERROR"})
+
+# 阶段变量显示值中按“-”连接展示的序列类型
+_JOINED_VALUE_TYPES = frozenset({tuple, list, set})
+
+
+def _format_variable_value(val):
+    """格式化阶段变量的显示值：tuple/list/set 以“-”连接，其余转为字符串"""
+    return "-".join(map(str, val)) if type(val) in _JOINED_VALUE_TYPES else str(val)
+
+
+class CommandQueue:
+    """
+    轻量命令队列：deque + 单把锁 + Event。
+    - put 仅持有一把锁并置位事件（queue.Queue 需锁 + not_empty 条件变量）；
+    - 工作线程通过 drain() 每次唤醒批量取出全部命令，连续点击产生的多条命令一次处理。
+    """
+
+    def __init__(self):
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def put(self, item) -> None:
+        """追加命令并唤醒等待中的工作线程（从不阻塞）"""
+        with self._lock:
+            self._items.append(item)
+            self._ready.set()
+
+    # 与 queue.Queue 接口保持一致：本队列无容量上限，put 本身即不阻塞
+    put_nowait = put
+
+    def drain(self) -> list:
+        """阻塞等待直到有命令，然后按入队顺序取出当前全部命令"""
+        while True:
+            self._ready.wait()
+            with self._lock:
+                items = list(self._items)
+                self._items.clear()
+                self._ready.clear()
+            if items:
+                return items
+
 class ProcessorWorker(QThread):
     """统一处理中心工作线程，负责调用ApplicationProcessor"""
     
@@ -39,7 +98,7 @@ class ProcessorWorker(QThread):
         初始化ProcessorWorker
         
         Args:
-        command_queue: 命令队列，用于接收用户输入
+        command_queue: 命令队列（CommandQueue），用于接收用户输入
         workflow_config: 工作流配置，如果为None则使用DEFAULT_WORKFLOW_CONFIG
         """
         super().__init__()
@@ -145,7 +204,7 @@ class ProcessorWorker(QThread):
     def request_stop(self) -> None:
         """请求停止工作线程
         - 设置内部停止标志，提示 run 循环尽快退出
-        - 向队列投递哨兵命令以唤醒阻塞的 get()
+        - 向 CommandQueue 投递哨兵命令：put 置位其内部 Event，唤醒阻塞在 drain() 中等待的工作线程
         """
         self._stop_requested = True
         try:
@@ -156,42 +215,43 @@ class ProcessorWorker(QThread):
     
     def run(self):
         """工作线程主循环
-        - 使用阻塞 get() 等待命令（不再抛出 Empty）
+        - 使用阻塞 drain() 等待命令，每次唤醒按顺序处理当前全部命令
         - 收到哨兵命令时退出循环
         - 捕获真实异常并上报类型 + 消息 + 堆栈
         """
         # print("工作线程启动")  # 调试：线程启动
         while not self._stop_requested:
-            try:
-                command, data = self.command_queue.get()  # 阻塞等待，无 timeout
+            for command, data in self.command_queue.drain():  # 阻塞等待，无 timeout
                 if command == "_stop":
                     # print("收到停止哨兵，准备退出")  # 调试：接收到停止哨兵
+                    self._stop_requested = True
                     break
 
-                if command == "send_command":
-                    # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到发送命令
-                    self.send_command_handle(data)
-
-                if command == "pre_command":
-                    # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到pre命令
-                    self.pre_command_handle(data)
-
-                if command == "create_command":
-                    # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到create命令
-                    self.create_command_handle(data)
-
-                if command == "post_command":
-                    # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到post命令
-                    self.post_command_handle(data)
-
-            except Exception as e:
-                # 捕获真实异常：补充类型与堆栈，避免空 message 导致“发生错误:”无详情
-                exc_type = type(e).__name__
-                exc_msg = str(e).strip() or "异常对象未提供消息文本；期望：包含清晰的错误说明。"
-                tb_text = traceback.format_exc()
-                composite_msg = f"发生错误: {exc_type}: {exc_msg}\n{tb_text}"
-                self.error_occurred.emit(composite_msg)
-                continue
+                try:
+                    if command == "send_command":
+                        # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到发送命令
+                        self.send_command_handle(data)
+
+                    if command == "pre_command":
+                        # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到pre命令
+                        self.pre_command_handle(data)
+
+                    if command == "create_command":
+                        # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到create命令
+                        self.create_command_handle(data)
+
+                    if command == "post_command":
+                        # print(f"收到命令: {command}, 数据: {data}")  # 调试：收到post命令
+                        self.post_command_handle(data)
+
+                except Exception as e:
+                    # 捕获真实异常：补充类型与堆栈，避免空 message 导致“发生错误:”无详情
+                    exc_type = type(e).__name__
+                    exc_msg = str(e).strip() or "异常对象未提供消息文本；期望：包含清晰的错误说明。"
+                    tb_text = traceback.format_exc()
+                    composite_msg = f"发生错误: {exc_type}: {exc_msg}\n{tb_text}"
+                    self.error_occurred.emit(composite_msg)
+                    continue
         # print("工作线程结束")  # 调试：线程退出
     
     def on_create_content(self, content):
@@ -206,18 +266,313 @@ class ProcessorWorker(QThread):
     def on_post_judge(self, post_judge):
         self.post_judge_received.emit(post_judge)
 
+    def enqueue_command(self, command):
+        """将 UI 派发的命令放入命令队列（连接到 ChatWindow.state_changed_and_dispatched）"""
+        self.command_queue.put_nowait(command)
+
     def delete_messages(self, count=0):
         """删除指定数量的消息"""
         self.main_processor.delete_messages(count)
         return
 
 class ChatWindow(QWidget):
+    # 单次状态迁移信号：置为运行状态并携带待派发命令，界面更新与命令入队均订阅此信号
+    state_changed_and_dispatched = Signal(object)
+
+    # 通用对话框样式（删除消息相关的输入框/提示框），类级定义一次，所有弹窗共用
+    _DIALOG_QSS = """
+        QDialog, QMessageBox {
+            background-color: #2b2b2b;
+            color: white;
+        }
+        QLabel {
+            color: white;
+            font-size: 14px;
+            margin: 10px 0;
+            min-width: 300px;
+            padding: 10px;
+        }
+        QLineEdit {
+            background-color: #404040;
+            color: white;
+            border: 1px solid #606060;
+            padding: 8px;
+            font-size: 14px;
+            border-radius: 4px;
+        }
+        QLineEdit:focus {
+            border: 2px solid #0078d4;
+        }
+        QPushButton {
+            background-color: #404040;
+            color: white;
+            border: 1px solid #606060;
+            padding: 8px 16px;
+            font-size: 14px;
+            border-radius: 4px;
+            min-width: 80px;
+        }
+        QPushButton:hover {
+            background-color: #505050;
+        }
+        QPushButton:pressed {
+            background-color: #303030;
+        }
+    """
+
+    # 错误弹窗样式：参考删除消息弹窗样式，统一黑底白字
+    _ERROR_DIALOG_QSS = """
+        QDialog {
+            background-color: #2b2b2b;
+            color: #ffffff;
+        }
+        QLabel {
+            color: #ffffff;
+            font-size: 14px;
+            margin: 8px 0;
+            padding: 0;
+        }
+        QTextEdit {
+            background-color: #000000;
+            color: #ffffff;
+            border: 1px solid #606060;
+            border-radius: 4px;
+            padding: 8px;
+            font-size: 13px;
+            font-family: 'Consolas', 'Monaco', monospace;
+        }
+        QPushButton {
+            background-color: #404040;
+            color: #ffffff;
+            border: 1px solid #606060;
+            padding: 8px 16px;
+            font-size: 14px;
+            border-radius: 4px;
+            min-width: 80px;
+        }
+        QPushButton:hover {
+            background-color: #505050;
+        }
+        QPushButton:pressed {
+            background-color: #303030;
+        }
+    """
+
+    # 消息框架样式：用户消息（蓝）与 AI 消息（绿）
+    _USER_QSS = """
+        QFrame {
+            background-color: rgba(100, 150, 255, 0.15);
+            border: 1px solid rgba(100, 150, 255, 0.3);
+            border-radius: 8px;
+            margin: 4px;
+            padding: 8px;
+        }
+    """
+    _AI_QSS = """
+        QFrame {
+            background-color: rgba(150, 255, 150, 0.15);
+            border: 1px solid rgba(150, 255, 150, 0.3);
+            border-radius: 8px;
+            margin: 4px;
+            padding: 8px;
+        }
+    """
+
+    # 逐条消息构建时复用的样式（类级常量，避免每次调用重新构造多行字符串）
+    # 消息发送者标签样式（AI 与用户消息共用）
+    _SENDER_LABEL_QSS = """
+        QLabel {
+            background-color: transparent;
+            color: rgba(255, 255, 255, 0.8);
+            font-size: 12px;
+            font-weight: bold;
+            margin: 0px;
+            padding: 0px;
+            border: none;
+        }
+    """
+    # “思考过程”折叠按钮样式
+    _REASONING_TOGGLE_QSS = """
+        QPushButton {
+            background-color: rgba(255, 255, 255, 0.1);
+            color: rgba(255, 255, 255, 0.8);
+            border: 1px solid rgba(255, 255, 255, 0.2);
+            border-radius: 4px;
+            padding: 4px 8px;
+            font-size: 14px;
+            text-align: left;
+        }
+        QPushButton:hover {
+            background-color: rgba(255, 255, 255, 0.15);
+        }
+        QPushButton:checked {
+            background-color: rgba(255, 255, 255, 0.2);
+        }
+    """
+    # 思考内容区域样式
+    _REASONING_QSS = """
+        QTextEdit {
+            background-color: rgba(0, 0, 0, 0.2);
+            color: rgba(255, 255, 255, 0.7);
+            font-size: 14px;
+            font-family: 'Consolas', 'Monaco', monospace;
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            border-radius: 4px;
+            padding: 8px;
+            margin: 0px;
+        }
+    """
+    # 消息固定宽度与 AI 正文/思考区宽度（减去 20 的 padding）；窗口缩放不影响，类定义时计算一次
+    _MSG_MAX_WIDTH = 1024
+    _AI_CONTENT_WIDTH = _MSG_MAX_WIDTH - 20
+    # AI 正文区域样式（宽度在类定义时代入一次，所有正文控件共用同一字符串对象）
+    _AI_CONTENT_QSS = """
+        QTextEdit {
+            background-color: transparent;
+            color: white;
+            font-size: 14px;
+            border: none;
+            margin: 0px;
+            padding: 0px;
+            width: %dpx;
+        }
+    """ % _AI_CONTENT_WIDTH
+    # 用户消息正文标签样式
+    _USER_LABEL_QSS = """
+        QLabel {
+            background-color: transparent;
+            color: white;
+            font-size: 14px;
+            line-height: 1.4;
+            margin: 0px;
+            padding: 0px;
+            border: none;
+        }
+    """
+
+    # 日志型文本栏（幕后-pre/post、调用监控）的最大段落数
+    _LOG_MAX_BLOCKS = 5000
+
+    # 单个变量组件的布局参数（外边距、行间距）
+    _VAR_LAYOUT_MARGINS = (4, 4, 4, 4)
+    _VAR_LAYOUT_SPACING = 4
+
+    # 变量展示区的聚合样式：在 variables_scroll_content 上设置一次，子控件通过 role/stage 属性选择器匹配
+    _VARIABLES_QSS = """
+        QFrame[role="var"] {
+            background-color: rgba(255, 255, 255, 0.05);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            border-radius: 4px;
+            padding: 8px;
+            margin: 2px;
+        }
+        QLabel[role="record"] {
+            color: #FFFFFF;
+            font-size: 12px;
+            background-color: transparent;
+            border: none;
+            padding: 2px;
+            margin: 2px;
+        }
+        QLabel[role="stageName"] {
+            color: #FFFFFF;
+            font-size: 12px;
+            font-weight: bold;
+            background-color: transparent;
+            border: none;
+            padding: 2px;
+            margin: 2px;
+        }
+        QLabel[role="stageRel"] {
+            color: rgba(255, 255, 255, 0.8);
+            font-size: 11px;
+            background-color: transparent;
+            border: none;
+            padding: 2px;
+            margin: 2px;
+        }
+        QProgressBar[stage="normal"],
+        QProgressBar[stage="last"] {
+            border: 1px solid rgba(255, 255, 255, 0.3);
+            border-radius: 8px;
+            background-color: rgba(0, 0, 0, 0.3);
+            text-align: center;
+            font-size: 10px;
+            color: white;
+        }
+        QProgressBar[stage="normal"]::chunk {
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                stop:0 #4CAF50, stop:1 #8BC34A);
+            border-radius: 7px;
+        }
+        QProgressBar[stage="last"]::chunk {
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                stop:0 #FFD700, stop:1 #FFA500);
+            border-radius: 7px;
+        }
+    """
+
     def __init__(self):
         super().__init__()
+        # 消息类型 -> 框架设置函数（宽度策略 + 样式）
+        self._MSG_SETUP = {"user": self._setup_user_msg, "ai": self._setup_ai_msg}
+        # 变量类型 -> 展示填充函数
+        self._VAR_DISPLAY = {
+            "record": self.create_record_variable_display,
+            "stage_independent": self.create_stage_variable_display,
+        }
         self.current_ai_message_widget = None
         self.current_ai_content_widget = None
         self.current_reasoning_widget = None
         self._stick_to_bottom = True
+        # 滚动区刷新状态：防重入标志与几何“脏”标志
+        self._refreshing_scroll = False
+        self._geom_dirty = True
+
+        # 错误弹窗：首次出错时构建，之后复用
+        self._error_dialog = None
+        self._error_summary_label = None
+        self._error_text_area = None
+
+        # “删除消息”相关弹窗：首次使用时构建，之后复用
+        self._delete_dialog = None
+        self._delete_confirm_box = None
+        self._delete_notice_box = None
+
+        # 共享 UI 泵定时器：复用单个 QTimer 处理延后的滚动/刷新，避免每次 singleShot 新建定时器与闭包
+        self._pending_refresh_scroll = False
+        self._pending_refresh_full = False  # 登记的刷新中是否含结构性（非流式）刷新，需要完整的布局失效
+        self._pending_scroll_to_bottom = False
+        self._ui_pump_timer = QTimer(self)
+        self._ui_pump_timer.setInterval(0)
+        self._ui_pump_timer.timeout.connect(self._pump_pending_ui)
+
+        # 流式文本合并缓冲：各目标的待插入文本块，由单次定时器合并刷新（布局更新 ≤60Hz）
+        self._stream_buffers = {"pre": [], "reasoning": [], "content": [], "post": [], "info": []}
+        self._stream_flush_timer = QTimer(self)
+        self._stream_flush_timer.setSingleShot(True)
+        self._stream_flush_timer.setInterval(16)
+        self._stream_flush_timer.timeout.connect(self._flush_stream_buffers)
+
+        # 历史消息正文高度的批量调整：填充时仅登记控件，由单个定时器分层（读取→写入→几何更新）统一处理
+        self._pending_height_adjusts = []
+        self._height_adjust_timer = QTimer(self)
+        self._height_adjust_timer.setSingleShot(True)
+        self._height_adjust_timer.setInterval(10)
+        self._height_adjust_timer.timeout.connect(self._run_height_adjusts)
+
+        # 外层滚动状态合并：滚动条值变化只记录最新值，16ms 内至多更新一次“粘底”状态
+        self._scroll_value_pending = 0
+        self._scroll_state_timer = QTimer(self)
+        self._scroll_state_timer.setSingleShot(True)
+        self._scroll_state_timer.setInterval(16)
+        self._scroll_state_timer.timeout.connect(self._apply_main_scroll_state)
+
+        # 离屏消息的延迟渲染：滚动停止后检查各 AI 正文是否远离视口（>2 屏），远离时清空文档、靠近时恢复
+        self._lazy_render_timer = QTimer(self)
+        self._lazy_render_timer.setSingleShot(True)
+        self._lazy_render_timer.setInterval(100)
+        self._lazy_render_timer.timeout.connect(self._update_offscreen_messages)
         
 
         self.is_streaming = False  # 新增：流式传输状态标志
@@ -239,12 +594,13 @@ class ChatWindow(QWidget):
         # 聊天记录加载配置
         self.max_history_messages = 9999  # 默认加载最新9999条消息
         self.loaded_variables = {}  # 存储从data.json加载的变量
+        self._var_widgets = {}  # 变量名 -> (展示组件, 结构键, 数值键)，用于增量刷新（见 _variable_keys）
         
         self.setup_ui()
         # 在UI设置完成后加载聊天记录
         self.load_chat_history()
 
-        self.worker_command_queue = Queue()
+        self.worker_command_queue = CommandQueue()
         self.processor_worker = ProcessorWorker(self.worker_command_queue, self.vm)
         
         # 连接信号
@@ -263,6 +619,10 @@ class ChatWindow(QWidget):
 
         self.processor_worker.error_occurred.connect(self._on_error_occurred)
 
+        # 状态迁移 + 命令派发：先切换界面到运行模式，再由工作线程对象将命令入队（按连接顺序执行）
+        self.state_changed_and_dispatched.connect(self._on_state_changed_and_dispatched)
+        self.state_changed_and_dispatched.connect(self.processor_worker.enqueue_command)
+
         # 启动线程
         self.processor_worker.start()
         self.switch_to_idle_state()
@@ -448,19 +808,26 @@ class ChatWindow(QWidget):
                     )
                     # print(f"准备渲染 {len(recent_records)} 条记录")  # 调试：确认渲染数量
 
-                    for record_id, record_data in recent_records:
-                        speaker = record_data.get('speaker', '')
-                        content = record_data.get('content', '')
-
-                        if speaker == 'User':
-                            self.add_message(content, "user")
-                        elif speaker == 'Assistant':
-                            reasoning = record_data.get('reasoning', '')
-                            # 将 reasoning 和 content 作为元组传递
-                            self.add_message((reasoning, content), "ai")
+                    # 批量构建：冻结滚动区并隐藏容器，逐条插入时不刷新滚动区，结束后统一布局一次
+                    self.message_area.setUpdatesEnabled(False)
+                    self.message_container.setVisible(False)
+                    try:
+                        for record_id, record_data in recent_records:
+                            speaker = record_data.get('speaker', '')
+                            content = record_data.get('content', '')
+
+                            if speaker == 'User':
+                                self.add_message(content, "user", refresh=False)
+                            elif speaker == 'Assistant':
+                                reasoning = record_data.get('reasoning', '')
+                                # 将 reasoning 和 content 作为元组传递
+                                self.add_message((reasoning, content), "ai", refresh=False)
+                    finally:
+                        self.message_container.setVisible(True)
+                        self.message_area.setUpdatesEnabled(True)
 
                     # 异步滚动到底部（避免启动阶段布局重算覆盖滚动位置）
-                    QTimer.singleShot(0, self._refresh_scroll_area)
+                    self._schedule_ui_pump(refresh=True)
 
                     # 重新绑定到最新的 AI 消息块
                     self._rebind_to_latest_ai_message()
@@ -539,6 +906,9 @@ class ChatWindow(QWidget):
             self.current_ai_message_widget = latest_ai_widget if latest_ai_widget else None
             self.current_ai_content_widget = latest_ai_content_widget if latest_ai_content_widget else None
             self.current_reasoning_widget = latest_reasoning_widget if latest_reasoning_widget else None
+            # 新绑定的正文控件若处于离屏清空状态，先恢复其内容
+            if self.current_ai_content_widget:
+                self._materialize_content(self.current_ai_content_widget)
             self.reasoning_toggle_button = latest_toggle_button if latest_toggle_button else None
 
             # 刷新滚动区域（保持与现有逻辑一致）
@@ -1017,6 +1387,8 @@ class ChatWindow(QWidget):
         self.variables_scroll_layout.setContentsMargins(0, 0, 0, 0)  # 边距0
         self.variables_scroll_layout.setSpacing(8)  # 间距8
         self.variables_scroll_layout.addStretch()  # 添加弹性空间，内容稍后添加
+        # 变量组件样式统一在容器上解析一次，子控件仅设置 role/stage 属性
+        self.variables_scroll_content.setStyleSheet(self._VARIABLES_QSS)
 
         scroll_area.setWidget(self.variables_scroll_content)
         variables_layout.addWidget(scroll_area)  # 占用剩余所有高度
@@ -1117,6 +1489,17 @@ class ChatWindow(QWidget):
             }
         """)
         text_layout.addWidget(self.text_area_2)
+
+        # 流式文本栏：由滚动条 valueChanged 维护粘底标志，插入时直接读取；并挂载常驻追加光标
+        for streaming_area in (self.text_area_1, self.text_area_2):
+            self._track_sticky_bottom(streaming_area)
+            self._attach_append_cursor(streaming_area)
+        # 信息尾部文本页使用 append() 追加，仅需粘底标志
+        self._track_sticky_bottom(self.right_text_area)
+        # 只读日志型文本栏：关闭撤销栈，并限制最大段落数以约束长会话内存
+        for log_area in (self.right_text_area, self.text_area_1, self.text_area_2):
+            log_area.document().setUndoRedoEnabled(False)
+            log_area.document().setMaximumBlockCount(self._LOG_MAX_BLOCKS)
         
         # 将两个页面添加到StackedWidget
         self.stacked_widget.addWidget(variables_page)  # 索引0：变量状态页面
@@ -1138,6 +1521,9 @@ class ChatWindow(QWidget):
         # 功能：切换界面到空闲模式并刷新控件可用性
         try:
             # print("切换至空闲模式：开始")  # 调试：入口日志
+            # 流式结束（完成/停止/出错）：收紧正文区的预分配高度
+            if self.statu == "running":
+                self._trim_streaming_height()
             self.send_button.setIcon(QIcon(get_asset_path("assets/send.png")))
             self.send_button.setStyleSheet("""
                 QToolButton {
@@ -1231,6 +1617,9 @@ class ChatWindow(QWidget):
         try:
             # print("切换至运行模式：开始")  # 调试：入口日志
             self.statu = "running"
+            # 新一轮流式从零开始预分配高度（同一控件可能经 reroll/重新绑定复用，残留的上一轮分配值会让气泡保持旧高度）
+            if self.current_ai_content_widget:
+                self.current_ai_content_widget._current_alloc_h = 0
             self.send_button.setIcon(QIcon(get_asset_path("assets/pause.png")))
             self.send_button.setStyleSheet("""
                 QToolButton {
@@ -1263,6 +1652,19 @@ class ChatWindow(QWidget):
                 f"切换到运行模式失败：更新界面控件状态时发生异常。可能原因：控件未初始化或资源路径无效；期望值：所有控件为有效实例、资源文件存在。错误详情：{e}"
             )
     
+    def _dispatch(self, command):
+        """
+        原子化的“切换到运行状态 + 派发命令”：先置 statu，再发出一次 state_changed_and_dispatched 信号。
+        Args:
+            command (tuple): (命令名, 数据)，例如 ("pre_command", "only")
+        """
+        self.statu = "running"
+        self.state_changed_and_dispatched.emit(command)
+
+    def _on_state_changed_and_dispatched(self, command):
+        """state_changed_and_dispatched 的界面侧订阅：切换按钮与右侧面板到运行模式"""
+        self.switch_to_running_state()
+
     def send_message(self):
         """发送消息的处理函数 - 修改为支持流式输出"""
         # 功能：读取输入并以流式方式触发消息处理与界面更新
@@ -1286,17 +1688,13 @@ class ChatWindow(QWidget):
             self._create_streaming_ai_message()
             # print("已创建AI消息容器（流式）")  # 调试：确认容器创建
             
-            # 4、切换按钮为运行模式
-            self.switch_to_running_state()
+            # 4、切换按钮为运行模式并向命令队列发送命令（同一次状态迁移）
+            command = ("send_command", input_content)
+            self._dispatch(command)
+            # print("已切换到运行模式并将发送命令加入队列")  # 调试：确认状态与命令
             # 强制刷新界面以确保切换立即生效
             self.stacked_widget.repaint()
             self.repaint()
-            # print("已切换到运行模式并刷新界面")  # 调试：确认UI刷新
-            
-            # 5、向命令队列发送命令
-            command = ("send_command", input_content)
-            self.worker_command_queue.put(command)
-            # print("已将发送命令加入队列")  # 调试：确认命令入队
             
             # 6、焦点设置为输入区
             self.text_input.setFocus()
@@ -1304,9 +1702,7 @@ class ChatWindow(QWidget):
             # 无条件将聊天区滚动至最下方，确保最新消息可见
             sb = self.message_area.verticalScrollBar()
             sb.setValue(sb.maximum())
-            QTimer.singleShot(0, lambda: self.message_area.verticalScrollBar().setValue(
-                self.message_area.verticalScrollBar().maximum()
-            ))
+            self._schedule_ui_pump(scroll_to_bottom=True)
         except Exception as e:
             self._on_error_occurred(
                 f"发送消息失败：组织流式输出或更新界面时发生异常。可能原因：输入控件/队列未初始化或消息容器创建失败；期望值：有效的文本输入控件、命令队列与消息容器。错误详情：{e}"
@@ -1340,6 +1736,9 @@ class ChatWindow(QWidget):
         """
         # 功能：在停止流式传输后根据最后一条AI消息的内容，追加停止标记或回填最新 reasoning/content
         try:
+            # 先落盘合并缓冲中的剩余文本，避免其在回填后才被追加
+            self._flush_stream_buffers()
+
             # 读取最新数据（相对 config/ 目录）
             raw_json = global_io_manager.read_json("data/data.json")
             data_obj = json.loads(raw_json)
@@ -1388,17 +1787,16 @@ class ChatWindow(QWidget):
             else:
                 # 新逻辑：清空并填入 reasoning 与 content
                 if hasattr(self, 'current_reasoning_widget') and self.current_reasoning_widget:
-                    self.current_reasoning_widget.clear()
                     self.current_reasoning_widget.setVisible(True)
-                    self.current_reasoning_widget.setPlainText(reasoning.strip())
+                    # 已流式显示的文本为最终文本前缀时仅补插差量，否则整体重写
+                    self._sync_plain_text(self.current_reasoning_widget, reasoning.strip())
                     # 调整思考区域高度
                     reasoning_doc = self.current_reasoning_widget.document()
                     reasoning_height = reasoning_doc.size().height()
                     self.current_reasoning_widget.setFixedHeight(int(reasoning_height) + 10)
 
                 if self.current_ai_content_widget:
-                    self.current_ai_content_widget.clear()
-                    self.current_ai_content_widget.setPlainText(content.strip())
+                    self._sync_plain_text(self.current_ai_content_widget, content.strip())
                     # 调整正文区域高度
                     content_doc = self.current_ai_content_widget.document()
                     content_height = content_doc.size().height()
@@ -1419,6 +1817,9 @@ class ChatWindow(QWidget):
         """流式传输完成"""
         # 功能：完成后处理并恢复空闲模式，同时刷新变量显示
         try:
+            # 先落盘合并缓冲中的剩余文本，确保界面内容完整
+            self._flush_stream_buffers()
+
             # 处理完整响应 - 复刻chat.py的后处理逻辑
             # print("完整输出开始")  # 调试：标记完整响应开始
             # print(full_response)  # 调试：输出完整响应内容
@@ -1443,9 +1844,11 @@ class ChatWindow(QWidget):
             # 1、如果存在当前AI消息引用，清空其内容以供新信息传入
             if self.current_ai_content_widget:
                 self.current_ai_content_widget.clear()
+                self.current_ai_content_widget._current_alloc_h = 0  # 清空后重新按新内容预分配高度
                 # print("清空当前AI内容区域")  # 调试：为新内容腾空显示区域
             
             if hasattr(self, 'current_reasoning_widget') and self.current_reasoning_widget:
+                self.current_reasoning_widget._deferred_text = None  # 丢弃未展开的历史思考内容
                 self.current_reasoning_widget.clear()
                 self.current_reasoning_widget.setVisible(True)  # 显示思考区域
                 # print("清空当前思考内容区域")  # 调试：重置思考区域以显示新的推理
@@ -1455,18 +1858,14 @@ class ChatWindow(QWidget):
                 # print("当前无AI消息引用，创建新的消息容器")  # 调试：首次或引用丢失时构建容器
                 self._create_streaming_ai_message()
             
-            # 2、切换按钮为暂停模式，切换右侧面板到双文本栏页面
-            self.switch_to_running_state()
+            # 2、切换按钮为暂停模式、切换右侧面板到双文本栏页面，并向命令队列发送命令
+            command = ("pre_command", "")
+            self._dispatch(command)
+            # print("已切换到运行模式并派发 pre_command")  # 调试：确认状态与命令
             
             # 强制刷新界面以确保切换立即生效
             self.stacked_widget.repaint()
             self.repaint()
-            # print("已切换到运行模式并刷新界面")  # 调试：确认UI刷新
-            
-            # 5、向命令队列发送命令
-            command = ("pre_command", "")
-            self.worker_command_queue.put(command)
-            # print("已向队列派发 pre_command")  # 调试：确认命令入队
             
             # 6、焦点设置为输入区
             self.text_input.setFocus()
@@ -1500,132 +1899,111 @@ class ChatWindow(QWidget):
     def reroll_pre_only(self):
         """处理reroll-前置更新按钮点击"""
         # 功能：确保容器可接收内容、切至运行模式并派发仅前置更新命令
-        try:
-            # 如果没有当前引用，则创建新的AI消息容器
-            if not self.current_ai_message_widget or not self.current_ai_content_widget:
-                # print("当前无AI消息引用，创建新的消息容器")  # 调试：首次或引用丢失时构建容器
-                self._create_streaming_ai_message()
-            
-            # print("reroll_pre_only 按钮被点击")  # 调试：记录触发动作
-            self.switch_to_running_state()
-            # 向命令队列发送命令
-            command = ("pre_command", "only")
-            self.worker_command_queue.put(command)
-            # print("已向队列派发 pre_command(only)")  # 调试：确认命令入队
-        except Exception as e:
-            self._on_error_occurred(
-                f"reroll-pre处理失败：准备容器或派发命令时发生异常。可能原因：控件未初始化或队列不可用；期望值：有效的消息容器与命令队列。错误详情：{e}"
-            )
+        # 成功路径不包 try：下列调用各自已有错误处理，命令派发不会阻塞或抛出
+        # 如果没有当前引用，则创建新的AI消息容器
+        if not self.current_ai_message_widget or not self.current_ai_content_widget:
+            # print("当前无AI消息引用，创建新的消息容器")  # 调试：首次或引用丢失时构建容器
+            self._create_streaming_ai_message()
+            if not self.current_ai_content_widget:
+                return  # 容器创建失败，错误已由 _create_streaming_ai_message 上报
+        
+        # print("reroll_pre_only 按钮被点击")  # 调试：记录触发动作
+        # 切至运行模式并向命令队列发送命令
+        self._dispatch(("pre_command", "only"))
+        # print("已向队列派发 pre_command(only)")  # 调试：确认命令入队
     
     def reroll_create_only(self):
         """处理reroll-正文按钮点击"""
         # 功能：清空当前显示区域、切至运行模式并派发仅正文生成命令
-        try:
-            # 1、如果存在当前AI消息引用，清空其内容以供新信息传入
-            self.current_ai_content_widget.clear()
-            # print("清空当前AI内容区域")  # 调试：为新内容腾空显示区域
-            self.current_reasoning_widget.clear()
-            self.current_reasoning_widget.setVisible(True)  # 显示思考区域
-            # print("清空当前思考内容区域")  # 调试：重置思考区域以显示新的推理
-            # print("reroll_create_only 按钮被点击")  # 调试：记录触发动作
-            
-            self.switch_to_running_state()
-            # 向命令队列发送命令
-            command = ("create_command", "only")
-            self.worker_command_queue.put(command)
-            # print("已向队列派发 create_command(only)")  # 调试：确认命令入队
-        except Exception as e:
-            self._on_error_occurred(
-                f"reroll-create处理失败：清空显示区域或派发命令时发生异常。可能原因：内容控件未初始化或队列不可用；期望值：有效的内容控件与命令队列。错误详情：{e}"
+        # 成功路径不包 try：仅对可能缺失的控件引用做显式检查
+        if self.current_ai_content_widget is None or self.current_reasoning_widget is None:
+            return self._on_error_occurred(
+                "reroll-create处理失败：当前没有可用的 AI 消息控件。可能原因：内容控件未初始化；期望值：有效的内容控件与思考区域。"
             )
+
+        # 1、如果存在当前AI消息引用，清空其内容以供新信息传入
+        self.current_ai_content_widget.clear()
+        self.current_ai_content_widget._current_alloc_h = 0  # 清空后重新按新内容预分配高度
+        # print("清空当前AI内容区域")  # 调试：为新内容腾空显示区域
+        self.current_reasoning_widget._deferred_text = None  # 丢弃未展开的历史思考内容
+        self.current_reasoning_widget.clear()
+        self.current_reasoning_widget.setVisible(True)  # 显示思考区域
+        # print("清空当前思考内容区域")  # 调试：重置思考区域以显示新的推理
+        # print("reroll_create_only 按钮被点击")  # 调试：记录触发动作
+        
+        # 切至运行模式并向命令队列发送命令
+        self._dispatch(("create_command", "only"))
+        # print("已向队列派发 create_command(only)")  # 调试：确认命令入队
     
     def reroll_post_only(self):
         """处理reroll-后置更新按钮点击"""
         # 功能：切至运行模式并派发仅后置更新命令
-        try:
-            # print("reroll_post_only 按钮被点击")  # 调试：记录触发动作
-            self.switch_to_running_state()
-            # 向命令队列发送命令
-            command = ("post_command", "")
-            self.worker_command_queue.put(command)
-            # print("已向队列派发 post_command")  # 调试：确认命令入队
-        except Exception as e:
-            self._on_error_occurred(
-                f"reroll-post处理失败：切换状态或派发命令时发生异常。可能原因：控件未初始化或队列不可用；期望值：有效的界面控件与命令队列。错误详情：{e}"
-            )
+        # 成功路径不包 try：状态切换自带错误处理，命令派发不会阻塞或抛出
+        # print("reroll_post_only 按钮被点击")  # 调试：记录触发动作
+        # 切至运行模式并向命令队列发送命令
+        self._dispatch(("post_command", ""))
+        # print("已向队列派发 post_command")  # 调试：确认命令入队
 
-    def handle_delete_messages(self):
-        """处理删除消息按钮点击事件"""
-        # 功能：弹出输入对话框，校验数量，确认后删除并刷新界面与变量
-        try:
-            if self.statu == "running":
-                return
-            
-            # 通用对话框样式
-            dialog_style = """
-                QDialog, QMessageBox {
-                    background-color: #2b2b2b;
-                    color: white;
-                }
-                QLabel {
-                    color: white;
-                    font-size: 14px;
-                    margin: 10px 0;
-                    min-width: 300px;
-                    padding: 10px;
-                }
-                QLineEdit {
-                    background-color: #404040;
-                    color: white;
-                    border: 1px solid #606060;
-                    padding: 8px;
-                    font-size: 14px;
-                    border-radius: 4px;
-                }
-                QLineEdit:focus {
-                    border: 2px solid #0078d4;
-                }
-                QPushButton {
-                    background-color: #404040;
-                    color: white;
-                    border: 1px solid #606060;
-                    padding: 8px 16px;
-                    font-size: 14px;
-                    border-radius: 4px;
-                    min-width: 80px;
-                }
-                QPushButton:hover {
-                    background-color: #505050;
-                }
-                QPushButton:pressed {
-                    background-color: #303030;
-                }
-            """
-            
-            # 获取删除数量
+    def _ensure_delete_dialog(self):
+        """
+        返回“删除消息”输入对话框；首次调用时构建并缓存，之后直接复用。
+        返回：
+        - QDialog: 已缓存的对话框（输入框为 self._delete_input）
+        """
+        if self._delete_dialog is None:
             dialog = QDialog(self)
             dialog.setWindowTitle("删除消息")
             dialog.setModal(True)
             dialog.resize(300, 150)
-            dialog.setStyleSheet(dialog_style)
-            
+            dialog.setStyleSheet(self._DIALOG_QSS)
+
             layout = QVBoxLayout(dialog)
             layout.addWidget(QLabel("请输入要从下往上删除的消息数量："))
-            
-            input_field = QLineEdit()
-            input_field.setText("1")
-            input_field.setPlaceholderText("请输入1-100之间的数字")
-            layout.addWidget(input_field)
-            
+
+            self._delete_input = QLineEdit()
+            self._delete_input.setPlaceholderText("请输入1-100之间的数字")
+            layout.addWidget(self._delete_input)
+
             button_layout = QHBoxLayout()
-            ok_button = QPushButton("确定")
-            cancel_button = QPushButton("取消")
-            ok_button.clicked.connect(dialog.accept)
-            cancel_button.clicked.connect(dialog.reject)
-            button_layout.addWidget(ok_button)
-            button_layout.addWidget(cancel_button)
+            self._delete_ok = QPushButton("确定")
+            self._delete_cancel = QPushButton("取消")
+            self._delete_ok.clicked.connect(dialog.accept)
+            self._delete_cancel.clicked.connect(dialog.reject)
+            button_layout.addWidget(self._delete_ok)
+            button_layout.addWidget(self._delete_cancel)
             layout.addLayout(button_layout)
+
+            self._delete_dialog = dialog
+        return self._delete_dialog
+
+    def _show_delete_notice(self, title, text, icon=QMessageBox.Icon.NoIcon):
+        """
+        使用缓存的提示框显示删除流程中的提示（输入错误/无消息/成功/失败）。
+        Args:
+            title (str): 窗口标题
+            text (str): 提示文本
+            icon (QMessageBox.Icon): 图标，默认无图标
+        """
+        if self._delete_notice_box is None:
+            self._delete_notice_box = QMessageBox(self)
+            self._delete_notice_box.setStyleSheet(self._DIALOG_QSS)
+        box = self._delete_notice_box
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.setIcon(icon)
+        box.exec()
+
+    def handle_delete_messages(self):
+        """处理删除消息按钮点击事件"""
+        # 功能：弹出输入对话框，校验数量，确认后删除并刷新界面与变量
+        try:
+            if self.statu == "running":
+                return
             
+            # 获取删除数量（对话框首次使用时构建，之后复用并重置输入）
+            dialog = self._ensure_delete_dialog()
+            input_field = self._delete_input
+            input_field.setText("1")
             input_field.setFocus()
             if dialog.exec() != QDialog.DialogCode.Accepted:
                 return
@@ -1634,37 +2012,29 @@ class ChatWindow(QWidget):
             try:
                 num_to_delete = int(input_field.text().strip())
                 if not 1 <= num_to_delete <= 100:
-                    warning_box = QMessageBox(self)
-                    warning_box.setWindowTitle("输入错误")
-                    warning_box.setText("请输入1-100之间的数字！")
-                    warning_box.setIcon(QMessageBox.Icon.Warning)
-                    warning_box.setStyleSheet(dialog_style)
-                    warning_box.exec()
+                    self._show_delete_notice("输入错误", "请输入1-100之间的数字！", QMessageBox.Icon.Warning)
                     # print(f"输入校验失败：{num_to_delete}")  # 调试：提示范围不合法
                     self._on_error_occurred(
                         f"删除数量输入错误：期望为 1-100 的整数，实际为 {num_to_delete}。请提供有效的删除条数。"
                     )
                     return
             except ValueError:
-                warning_box = QMessageBox(self)
-                warning_box.setWindowTitle("输入错误")
-                warning_box.setText("请输入有效的数字！")
-                warning_box.setIcon(QMessageBox.Icon.Warning)
-                warning_box.setStyleSheet(dialog_style)
-                warning_box.exec()
+                self._show_delete_notice("输入错误", "请输入有效的数字！", QMessageBox.Icon.Warning)
                 # print("输入解析失败：非数字")  # 调试：提示类型错误
                 self._on_error_occurred(
                     f"删除数量格式错误：期望输入为整数数字字符串，收到内容为 '{input_field.text().strip()}'; 请输入 1-100 的整数。"
                 )
                 return
             
-            # 确认删除
-            confirm_box = QMessageBox(self)
-            confirm_box.setWindowTitle("确认删除")
+            # 确认删除（确认框首次使用时构建，之后仅更新文本）
+            if self._delete_confirm_box is None:
+                self._delete_confirm_box = QMessageBox(self)
+                self._delete_confirm_box.setWindowTitle("确认删除")
+                self._delete_confirm_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                self._delete_confirm_box.setStyleSheet(self._DIALOG_QSS)
+            confirm_box = self._delete_confirm_box
             confirm_box.setText(f"确定要删除最后 {num_to_delete} 条消息吗？此操作不可撤销。")
-            confirm_box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             confirm_box.setDefaultButton(QMessageBox.StandardButton.No)
-            confirm_box.setStyleSheet(dialog_style)
             
             if confirm_box.exec() != QMessageBox.StandardButton.Yes:
                 return
@@ -1674,12 +2044,7 @@ class ChatWindow(QWidget):
                 # 获取当前消息数量（排除最后的stretch）
                 total_messages = self.message_layout.count() - 1
                 if total_messages <= 0:
-                    info_box = QMessageBox(self)
-                    info_box.setWindowTitle("提示")
-                    info_box.setText("没有可删除的消息。")
-                    info_box.setIcon(QMessageBox.Icon.Information)
-                    info_box.setStyleSheet(dialog_style)
-                    info_box.exec()
+                    self._show_delete_notice("提示", "没有可删除的消息。", QMessageBox.Icon.Information)
                     # print("没有可删除的消息")  # 调试：列表为空
                     return
                 
@@ -1688,46 +2053,45 @@ class ChatWindow(QWidget):
                 # print(f"将删除消息数量：{actual_delete_count}")  # 调试：确认最终删除数量
                 
                 # 从GUI中删除消息组件（从下往上删除）
-                deleted_widgets = []
-                for i in range(actual_delete_count):
-                    # 获取倒数第二个item（最后一个是stretch）
-                    item_index = self.message_layout.count() - 2
-                    if item_index >= 0:
-                        item = self.message_layout.takeAt(item_index)
-                        if item and item.widget():
-                            widget = item.widget()
-                            deleted_widgets.append(widget)
-                            widget.setParent(None)  # 从界面中移除
+                # 先冻结滚动区并隐藏容器，离线修改布局后一次性恢复，避免每删一条就重排整列
+                self.message_area.setUpdatesEnabled(False)
+                self.message_container.setVisible(False)
+                try:
+                    # 预先计算待删除的布局索引（倒数第二个item开始，最后一个是stretch），按降序移除，
+                    # 前面的索引不会因后面的移除而偏移，整段只需一次 invalidate
+                    count = self.message_layout.count()
+                    target_indices = list(range(count - 2, count - 2 - actual_delete_count, -1))
+                    for idx in target_indices:
+                        item = self.message_layout.itemAt(idx)
+                        w = item.widget() if item else None
+                        if w is None:
+                            continue
+                        w.setParent(None)  # 从界面中移除（布局项随之移除）
+                        w.deleteLater()    # 销毁交由事件循环统一处理
+                finally:
+                    self.message_container.setVisible(True)
+                    self.message_area.setUpdatesEnabled(True)
+                self.message_layout.invalidate()
                 
                 # 调用ProcessorWorker删除数据文件中的消息
                 self.processor_worker.delete_messages(actual_delete_count)
                 # print("已删除数据文件中的消息")  # 调试：确认数据层删除
                 
-                # 重新绑定到最新的AI消息
+                # 重新绑定到最新的AI消息（内部已执行一次滚动区刷新）
                 self._rebind_to_latest_ai_message()
                 
-                # 刷新界面和变量显示
-                self._refresh_scroll_area()
+                # 刷新变量显示
                 self.update_variables_display()
                 
                 # 重新检查状态并更新按钮状态
                 self.switch_to_idle_state()
                 
                 # 显示成功消息
-                msg_box = QMessageBox(self)
-                msg_box.setWindowTitle("删除成功")
-                msg_box.setText(f"已成功删除 {actual_delete_count} 条消息。")
-                msg_box.setStyleSheet(dialog_style)
-                msg_box.exec()
+                self._show_delete_notice("删除成功", f"已成功删除 {actual_delete_count} 条消息。")
                 # print("删除操作已完成")  # 调试：确认用户提示
             except Exception as e:
                 # print(f"删除过程出现异常：{e}")  # 调试：记录异常详情
-                error_box = QMessageBox(self)
-                error_box.setWindowTitle("删除失败")
-                error_box.setText(f"删除消息时发生错误：{str(e)}")
-                error_box.setIcon(QMessageBox.Icon.Critical)
-                error_box.setStyleSheet(dialog_style)
-                error_box.exec()
+                self._show_delete_notice("删除失败", f"删除消息时发生错误：{str(e)}", QMessageBox.Icon.Critical)
                 self._on_error_occurred(
                     f"删除消息失败：执行删除或界面刷新时发生异常。可能原因：布局项无效、处理器未初始化或消息不存在；期望值：有效的消息布局与处理器实例。错误详情：{e}"
                 )
@@ -1737,8 +2101,63 @@ class ChatWindow(QWidget):
             )
     
     def _on_pre_judge_received(self, pre_judge_content):
+        """处理 pre-judge 信号：写入合并缓冲，由定时器统一刷新到第一个文本栏"""
+        self._buffer_stream_chunk("pre", pre_judge_content)
+
+    def _on_create_reasoning_received(self, reasoning_content):
+        """接收到思考内容：写入合并缓冲，由定时器统一刷新到思考区域"""
+        self._buffer_stream_chunk("reasoning", reasoning_content)
+
+    def _on_create_content_received(self, content):
+        """接收到新的文本块：写入合并缓冲，由定时器统一刷新到 AI 内容区域"""
+        self._buffer_stream_chunk("content", content)
+
+    def _on_post_judge_received(self, post_judge_content):
+        """处理 post-judge 信号：写入合并缓冲，由定时器统一刷新到第二个文本栏"""
+        self._buffer_stream_chunk("post", post_judge_content)
+
+    def _on_information_received(self, info: str):
+        """处理任意阶段的信息尾部（pre/create/post）：空字符串不处理，非空写入合并缓冲"""
+        if not isinstance(info, str) or info.strip() == "":
+            # print("信息尾部为空或类型非字符串，忽略追加")  # 调试：输入为空或类型错误
+            return
+        self._buffer_stream_chunk("info", info)
+
+    def _buffer_stream_chunk(self, target, text):
+        """
+        将流式文本块追加到指定目标的缓冲区，并在定时器空闲时启动合并刷新。
+        Args:
+            target (str): 缓冲目标（pre/reasoning/content/post/info）
+            text (str): 文本块
+        """
+        self._stream_buffers[target].append(text)
+        if not self._stream_flush_timer.isActive():
+            self._stream_flush_timer.start()
+
+    def _flush_stream_buffers(self):
+        """
+        合并刷新所有流式缓冲区：每个目标一次插入、一次高度调整与一次滚动刷新。
+        - 在流程结束/停止前也会被直接调用，确保缓冲内容不会滞后于状态切换。
         """
-        处理 pre-judge 信号，将内容显示在第一个文本栏。
+        self._stream_flush_timer.stop()
+        for target, append, separator in (
+            ("pre", self._append_pre_judge, ""),
+            ("reasoning", self._append_create_reasoning, ""),
+            ("content", self._append_create_content, ""),
+            ("post", self._append_post_judge, ""),
+            ("info", self._append_information, "\n"),  # 信息尾部按条换行
+        ):
+            chunks = self._stream_buffers[target]
+            if chunks:
+                self._stream_buffers[target] = []
+                append(separator.join(chunks))
+                if target in ("reasoning", "content"):
+                    # 消息高度可能变化：每帧（16ms 合并）最多置位一次几何脏标志
+                    self._geom_dirty = True
+
+    def _append_pre_judge(self, pre_judge_content):
+        """
+        将 pre-judge 内容显示在第一个文本栏。
         - 使用文档光标在末尾插入，避免改变可视光标导致视图跳动；
         - 仅在用户原本接近底部时自动滚动到底。
         Args:
@@ -1748,85 +2167,71 @@ class ChatWindow(QWidget):
         try:
             # print("pre-judge 接收：开始处理")  # 调试：入口日志
             if hasattr(self, 'text_area_1'):
-                sb = self.text_area_1.verticalScrollBar()
-                was_near_bottom = (sb.maximum() - sb.value()) <= 20
+                sb = self.text_area_1._vsb
+                was_near_bottom = self.text_area_1._stickyBottom
 
-                # 文档末尾插入，不设置控件光标
-                doc_cursor = QTextCursor(self.text_area_1.document())
-                doc_cursor.movePosition(QTextCursor.End)
-                doc_cursor.insertText(pre_judge_content)
+                # 文档末尾插入（常驻追加光标），不设置控件光标
+                self._append_at_end(self.text_area_1, pre_judge_content)
                 # print(f"pre_judge_content 长度：{len(pre_judge_content)}")  # 调试：内容长度
 
-                # 保持到底仅在接近底部时
+                # 保持到底仅在接近底部时（最大值取 rangeChanged 维护的缓存）
                 if was_near_bottom:
-                    sb.setValue(sb.maximum())
+                    sb.setValue(self.text_area_1._sb_max)
         except Exception as e:
             self._on_error_occurred(
                 f"pre-judge 显示失败：在文本栏1追加内容时发生异常。可能原因：控件未初始化或内容类型错误；期望值：已创建的 QTextEdit 与 str 类型内容。错误详情：{e}"
             )
     
-    def _on_create_reasoning_received(self, reasoning_content):
-        """接收到思考内容"""
+    def _append_create_reasoning(self, reasoning_content):
+        """将思考内容追加到思考区域"""
         # 功能：将推理内容追加到思考区域，并在需要时展开与自适应高度
         try:
             if hasattr(self, 'current_reasoning_widget') and self.current_reasoning_widget:
                 # 将思考内容追加到思考区域
-                # 记录追加前滚动位置是否接近底部（≤20px）
-                sb = self.current_reasoning_widget.verticalScrollBar()
-                was_near_bottom = (sb.maximum() - sb.value()) <= 20
-
-                # 使用“文档光标”在末尾插入，避免改变可视光标位置
-                doc_cursor = QTextCursor(self.current_reasoning_widget.document())
-                doc_cursor.movePosition(QTextCursor.End)
-                doc_cursor.insertText(reasoning_content)
-                # print(f"接收到思考内容长度：{len(reasoning_content)}")  # 调试：内容长度
+                # 读取粘底标志（由滚动条 valueChanged 维护，≤20px 视为接近底部）
+                sb = self.current_reasoning_widget._vsb
+                was_near_bottom = self.current_reasoning_widget._stickyBottom
 
-                # 调整思考区域高度
-                document = self.current_reasoning_widget.document()
-                height = min(document.size().height() + 20, 200)  # 限制最大高度为200px
-                self.current_reasoning_widget.setFixedHeight(int(height))
+                # 使用常驻“文档光标”在末尾插入，避免改变可视光标位置
+                self._append_at_end(self.current_reasoning_widget, reasoning_content)
+                # print(f"接收到思考内容长度：{len(reasoning_content)}")  # 调试：内容长度
+                # 高度由 textChanged 蹦床合并调整（见 _schedule_reasoning_resize），此处无需同步计算
 
                 # 若原本接近底部，保持到底；否则尊重用户位置
                 if was_near_bottom:
-                    sb.setValue(sb.maximum())
+                    sb.setValue(self.current_reasoning_widget._sb_max)
 
                 # 如果有思考内容，自动展开思考区域
                 if hasattr(self, 'reasoning_toggle_button') and not self.reasoning_toggle_button.isChecked():
                     self.reasoning_toggle_button.setChecked(True)
 
                 # 刷新滚动区域（外层滚动区只在“粘底”时自动到底）
-                QTimer.singleShot(0, self._refresh_scroll_area)
+                self._schedule_ui_pump(refresh=True, streaming=True)
         except Exception as e:
             self._on_error_occurred(
                 f"思考内容显示失败：在推理区域追加或调整高度时发生异常。可能原因：控件未初始化或内容类型错误；期望值：有效的 QTextEdit 与 str 类型内容。错误详情：{e}"
             )
     
-    def _on_create_content_received(self, content):
-        """接收到新的文本块"""
+    def _append_create_content(self, content):
+        """将正文文本追加到 AI 内容区域"""
         # 功能：将正文内容追加到 AI 内容区域，并自适应高度与滚动
         try:
             if self.current_ai_content_widget:
-                # 使用“文档光标”在末尾插入，避免改变可视光标位置
-                doc_cursor = QTextCursor(self.current_ai_content_widget.document())
-                doc_cursor.movePosition(QTextCursor.End)
-                doc_cursor.insertText(content)
+                # 使用常驻“文档光标”在末尾插入，避免改变可视光标位置
+                self._append_at_end(self.current_ai_content_widget, content)
                 # print(f"接收到正文块长度：{len(content)}")  # 调试：内容长度
-
-                # 调整QTextEdit高度以适应内容
-                document = self.current_ai_content_widget.document()
-                height = document.size().height()
-                self.current_ai_content_widget.setFixedHeight(int(height) + 10)
+                # 高度由 documentSizeChanged 信号驱动（见 _on_doc_size_changed），此处无需同步计算
 
                 # 刷新滚动区域，保持在底部（仅在“粘底”状态时）
-                QTimer.singleShot(0, self._refresh_scroll_area)
+                self._schedule_ui_pump(refresh=True, streaming=True)
         except Exception as e:
             self._on_error_occurred(
                 f"正文内容显示失败：在 AI 内容区域追加或调整高度时发生异常。可能原因：控件未初始化或内容类型错误；期望值：有效的 QTextEdit 与 str 类型内容。错误详情：{e}"
             )
     
-    def _on_post_judge_received(self, post_judge_content):
+    def _append_post_judge(self, post_judge_content):
         """
-        处理 post-judge 信号，将内容显示在第二个文本栏。
+        将 post-judge 内容显示在第二个文本栏。
         - 使用文档光标在末尾插入，避免改变可视光标导致视图跳动；
         - 仅在用户原本接近底部时自动滚动到底。
         Args:
@@ -1836,52 +2241,46 @@ class ChatWindow(QWidget):
         try:
             # print("post-judge 接收：开始处理")  # 调试：入口日志
             if hasattr(self, 'text_area_2'):
-                sb = self.text_area_2.verticalScrollBar()
-                was_near_bottom = (sb.maximum() - sb.value()) <= 20
+                sb = self.text_area_2._vsb
+                was_near_bottom = self.text_area_2._stickyBottom
 
-                # 文档末尾插入，不设置控件光标
-                doc_cursor = QTextCursor(self.text_area_2.document())
-                doc_cursor.movePosition(QTextCursor.End)
-                doc_cursor.insertText(post_judge_content)
+                # 文档末尾插入（常驻追加光标），不设置控件光标
+                self._append_at_end(self.text_area_2, post_judge_content)
                 # print(f"post_judge_content 长度：{len(post_judge_content)}")  # 调试：内容长度
 
-                # 保持到底仅在接近底部时
+                # 保持到底仅在接近底部时（最大值取 rangeChanged 维护的缓存）
                 if was_near_bottom:
-                    sb.setValue(sb.maximum())
+                    sb.setValue(self.text_area_2._sb_max)
         except Exception as e:
             self._on_error_occurred(
                 f"post-judge 显示失败：在文本栏2追加内容时发生异常。可能原因：控件未初始化或内容类型错误；期望值：已创建的 QTextEdit 与 str 类型内容。错误详情：{e}"
             )
     
-    def _on_information_received(self, info: str):
+    def _append_information(self, info: str):
         """
-        处理任意阶段的信息尾部（pre/create/post）
-        - 空字符串不处理；
-        - 非空追加到右侧滚动文本页（right_text_area）；
-        - 使用文档光标在末尾插入，避免控件光标变动导致视图错位；
-        - 允许上滚，仅在接近底部时自动保持到底；
+        将信息尾部追加到右侧滚动文本页（right_text_area）
+        - 文本已由缓冲阶段过滤空串，多条信息以换行拼接；
+        - 使用 QTextEdit.append() 快速路径追加为新段落，无需在 Python 侧构造光标；
+        - 允许上滚，仅在接近底部时自动保持到底，否则恢复追加前的位置；
         Args:
             info (str): 信息尾部文本
         """
         # 功能：将信息尾部追加到右侧文本页，保持用户滚动位置
         try:
-            if not isinstance(info, str) or info.strip() == "":
-                # print("信息尾部为空或类型非字符串，忽略追加")  # 调试：输入为空或类型错误
-                return
             if hasattr(self, 'right_text_area'):
-                sb = self.right_text_area.verticalScrollBar()
-                was_near_bottom = (sb.maximum() - sb.value()) <= 20
-
-                # 文档末尾插入，不设置控件光标
-                doc_cursor = QTextCursor(self.right_text_area.document())
-                doc_cursor.movePosition(QTextCursor.End)
-                doc_cursor.insertText(info)
-                doc_cursor.insertText("\n")
+                sb = self.right_text_area._vsb
+                was_near_bottom = self.right_text_area._stickyBottom
+                previous_value = self.right_text_area._sb_val
+
+                # append() 快速路径：追加为新段落
+                self.right_text_area.append(info)
                 # print(f"信息尾部追加长度：{len(info)}")  # 调试：内容长度
 
-                # 保持到底仅在接近底部时
+                # 保持到底仅在接近底部时；否则还原用户的滚动位置
                 if was_near_bottom:
-                    sb.setValue(sb.maximum())
+                    sb.setValue(self.right_text_area._sb_max)
+                else:
+                    sb.setValue(previous_value)
         except Exception as e:
             self._on_error_occurred(
                 f"信息尾部显示失败：在右侧文本页追加或滚动时发生异常。可能原因：控件未初始化或内容类型错误；期望值：有效的 QTextEdit 与 str 类型内容。错误详情：{e}"
@@ -1914,10 +2313,7 @@ class ChatWindow(QWidget):
         # 规范化并兜底空消息
         raw = (message or "").strip()
         if not raw:
-            raw = (
-                "发生错误，但未提供任何错误信息；原因：错误消息为空或仅空白；"
-                "期望：传入清晰、具体的错误说明文本。"
-            )
+            raw = _BLANK_ERROR_TEXT
         # 根据是否包含 traceback 构造摘要与详细文本
         has_traceback = "Traceback" in raw
         if has_traceback:
@@ -1930,71 +2326,42 @@ class ChatWindow(QWidget):
 
         # print(f"显示错误弹窗：{summary}")  # 调试：记录最终展示的错误摘要
 
-        # 参考删除消息弹窗样式，统一黑底白字
-        dialog_style = """
-            QDialog {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-            QLabel {
-                color: #ffffff;
-                font-size: 14px;
-                margin: 8px 0;
-                padding: 0;
-            }
-            QTextEdit {
-                background-color: #000000;
-                color: #ffffff;
-                border: 1px solid #606060;
-                border-radius: 4px;
-                padding: 8px;
-                font-size: 13px;
-                font-family: 'Consolas', 'Monaco', monospace;
-            }
-            QPushButton {
-                background-color: #404040;
-                color: #ffffff;
-                border: 1px solid #606060;
-                padding: 8px 16px;
-                font-size: 14px;
-                border-radius: 4px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #505050;
-            }
-            QPushButton:pressed {
-                background-color: #303030;
-            }
-        """
+        # 自定义弹窗，带可滚动文本区（首次出错时构建，之后复用）
+        if self._error_dialog is None:
+            error_dialog = QDialog(self)
+            error_dialog.setWindowTitle("错误")
+            error_dialog.setModal(True)
+            error_dialog.resize(640, 420)
+            error_dialog.setStyleSheet(self._ERROR_DIALOG_QSS)
+
+            layout = QVBoxLayout(error_dialog)
+            self._error_summary_label = QLabel()
+            self._error_summary_label.setWordWrap(True)
+            layout.addWidget(self._error_summary_label)
+
+            self._error_text_area = QTextEdit()
+            self._error_text_area.setReadOnly(True)
+            self._error_text_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+            self._error_text_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+            layout.addWidget(self._error_text_area)
+
+            buttons_layout = QHBoxLayout()
+            ok_button = QPushButton("确定")
+            ok_button.clicked.connect(error_dialog.accept)
+            buttons_layout.addStretch(1)
+            buttons_layout.addWidget(ok_button)
+            layout.addLayout(buttons_layout)
+
+            self._error_dialog = error_dialog
+
+        if self._error_dialog.isVisible():
+            # 弹窗正在显示（模态期间又发生错误）：追加到详情区，避免在同一对话框上嵌套 exec()
+            self._error_text_area.append("\n" + detail)
+            return
 
-        # 自定义弹窗，带可滚动文本区
-        error_dialog = QDialog(self)
-        error_dialog.setWindowTitle("错误")
-        error_dialog.setModal(True)
-        error_dialog.resize(640, 420)
-        error_dialog.setStyleSheet(dialog_style)
-
-        layout = QVBoxLayout(error_dialog)
-        summary_label = QLabel(summary)
-        summary_label.setWordWrap(True)
-        layout.addWidget(summary_label)
-
-        text_area = QTextEdit()
-        text_area.setReadOnly(True)
-        text_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        text_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        text_area.setText(detail)
-        layout.addWidget(text_area)
-
-        buttons_layout = QHBoxLayout()
-        ok_button = QPushButton("确定")
-        ok_button.clicked.connect(error_dialog.accept)
-        buttons_layout.addStretch(1)
-        buttons_layout.addWidget(ok_button)
-        layout.addLayout(buttons_layout)
-
-        error_dialog.exec()
+        self._error_summary_label.setText(summary)
+        self._error_text_area.setPlainText(detail)
+        self._error_dialog.exec()
     
     def _on_error_occurred(self, error_message):
         """统一错误处理入口
@@ -2009,16 +2376,9 @@ class ChatWindow(QWidget):
 
         display_msg = msg.strip()
         if not display_msg:
-            display_msg = (
-                "发生未知错误（未提供错误详情）；原因：错误消息为空或无法转为字符串；"
-                "期望：提供清晰、具体的错误说明文本以便排查。"
-            )
-        if display_msg.endswith(":") or display_msg in {"发生错误", "错误", "Error", "ERROR"}:
-            display_msg = (
-                display_msg
-                + " 未提供错误详情；原因：异常消息为空或未格式化；"
-                "期望：包含异常类型名与详细说明（例如 ValueError: 参数 x 不合法）。"
-            )
+            display_msg = _UNKNOWN_ERROR_TEXT
+        if display_msg in _TERSE_ERRORS or display_msg.endswith(":"):
+            display_msg = display_msg + _TERSE_ERROR_SUFFIX
 
         # print(f"错误上报：{display_msg}")  # 调试：记录统一错误入口的消息
         self.show_ephemeral_error(display_msg)
@@ -2041,42 +2401,19 @@ class ChatWindow(QWidget):
             message_widget.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.MinimumExpanding)
             
             # 计算最大宽度
-            max_width = 1024
+            max_width = self._MSG_MAX_WIDTH
             message_widget.setMaximumWidth(max_width)
             
-            # 根据消息类型设置不同的宽度策略
-            if message_type == "ai":
-                # AI消息设置固定宽度为最大宽度，确保充分利用空间
-                message_widget.setFixedWidth(max_width)
-            else:
-                # 用户消息保持内容自适应宽度
-                message_widget.setMinimumWidth(0)
-            
             # 确保高度能够自适应内容
             message_widget.setMinimumHeight(0)
             
-            # 根据消息类型设置样式
-            if message_type == "user":
-                message_widget.setStyleSheet("""
-                    QFrame {
-                        background-color: rgba(100, 150, 255, 0.15);
-                        border: 1px solid rgba(100, 150, 255, 0.3);
-                        border-radius: 8px;
-                        margin: 4px;
-                        padding: 8px;
-                    }
-                """)
-            elif message_type == "ai":
-                # AI消息样式（用于历史记录加载）
-                message_widget.setStyleSheet("""
-                    QFrame {
-                        background-color: rgba(150, 255, 150, 0.15);
-                        border: 1px solid rgba(150, 255, 150, 0.3);
-                        border-radius: 8px;
-                        margin: 4px;
-                        padding: 8px;
-                    }
-                """)
+            # 按消息类型查表设置宽度策略与样式（类级常量样式，不再逐条构造字符串）
+            setup = self._MSG_SETUP.get(message_type)
+            if setup:
+                setup(message_widget, max_width)
+            else:
+                # 未知类型保持内容自适应宽度
+                message_widget.setMinimumWidth(0)
             
             return message_widget
         except Exception as e:
@@ -2084,6 +2421,16 @@ class ChatWindow(QWidget):
                 f"消息组件创建失败：设置尺寸或样式时发生异常。可能原因：参数 message_type 无效或控件初始化失败；期望值：message_type 为 'user' 或 'ai'，控件能正常创建。错误详情：{e}"
             )
     
+    def _setup_user_msg(self, message_widget, max_width):
+        """用户消息：保持内容自适应宽度，应用用户消息样式"""
+        message_widget.setMinimumWidth(0)
+        message_widget.setStyleSheet(self._USER_QSS)
+
+    def _setup_ai_msg(self, message_widget, max_width):
+        """AI消息（用于历史记录加载与流式容器）：固定为最大宽度以充分利用空间，应用AI消息样式"""
+        message_widget.setFixedWidth(max_width)
+        message_widget.setStyleSheet(self._AI_QSS)
+
     def _create_ai_message_widget(self):
         """创建标准的AI消息组件，支持思考内容和正式回复
         - 内联整合了折叠/展开时的高度控制，以及内容变化时的高度自适应
@@ -2091,8 +2438,9 @@ class ChatWindow(QWidget):
         """
         # 功能：构建包含思考内容与正式回复的 AI 消息组件
         try:
-            # 设置固定宽度
-            FIXED_WIDTH = 1024  # 固定宽度
+            # 固定宽度（类级常量）
+            FIXED_WIDTH = self._MSG_MAX_WIDTH
+            content_width = self._AI_CONTENT_WIDTH  # 减去padding
             
             # 创建消息组件
             ai_message_widget = self._create_message_widget("", "ai", None)
@@ -2108,23 +2456,13 @@ class ChatWindow(QWidget):
             # 创建发送者标签
             sender_label = QLabel("AI助手")
             sender_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-            sender_label.setStyleSheet("""
-                QLabel {
-                    background-color: transparent;
-                    color: rgba(255, 255, 255, 0.8);
-                    font-size: 12px;
-                    font-weight: bold;
-                    margin: 0px;
-                    padding: 0px;
-                    border: none;
-                }
-            """)
+            sender_label.setStyleSheet(self._SENDER_LABEL_QSS)
             message_layout.addWidget(sender_label)
             
             # 创建可折叠的思考内容区域
             # 主容器
             reasoning_container = QWidget()
-            reasoning_container.setFixedWidth(FIXED_WIDTH - 20)
+            reasoning_container.setFixedWidth(content_width)
             container_layout = QVBoxLayout(reasoning_container)
             container_layout.setContentsMargins(0, 0, 0, 0)
             container_layout.setSpacing(0)
@@ -2133,23 +2471,7 @@ class ChatWindow(QWidget):
             self.reasoning_toggle_button = QPushButton("💭 思考过程")
             self.reasoning_toggle_button.setCheckable(True)
             self.reasoning_toggle_button.setChecked(False)  # 默认折叠
-            self.reasoning_toggle_button.setStyleSheet("""
-                QPushButton {
-                    background-color: rgba(255, 255, 255, 0.1);
-                    color: rgba(255, 255, 255, 0.8);
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    border-radius: 4px;
-                    padding: 4px 8px;
-                    font-size: 14px;
-                    text-align: left;
-                }
-                QPushButton:hover {
-                    background-color: rgba(255, 255, 255, 0.15);
-                }
-                QPushButton:checked {
-                    background-color: rgba(255, 255, 255, 0.2);
-                }
-            """)
+            self.reasoning_toggle_button.setStyleSheet(self._REASONING_TOGGLE_QSS)
             
             # 内容区域（思考内容）
             reasoning_widget = QTextEdit()
@@ -2158,63 +2480,27 @@ class ChatWindow(QWidget):
             reasoning_widget.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
             reasoning_widget.setMaximumHeight(200)  # 限制最大高度
             reasoning_widget.setVisible(False)  # 默认隐藏
-            reasoning_widget.setStyleSheet("""
-                QTextEdit {
-                    background-color: rgba(0, 0, 0, 0.2);
-                    color: rgba(255, 255, 255, 0.7);
-                    font-size: 14px;
-                    font-family: 'Consolas', 'Monaco', monospace;
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                    border-radius: 4px;
-                    padding: 8px;
-                    margin: 0px;
-                }
-            """)
+            reasoning_widget.setStyleSheet(self._REASONING_QSS)
             # 统一推理区域宽度到容器宽度，避免宽度异常
-            reasoning_widget.setFixedWidth(FIXED_WIDTH - 20)
+            reasoning_widget.setFixedWidth(content_width)
             # 水平/垂直固定（水平与容器一致，垂直由下方逻辑控制）
             reasoning_widget.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+            # 文本宽度与文档边距固定不变：在构造时设置/读取一次，避免每次回调重复设置与读取
+            TEXT_WIDTH = content_width - 10
+            reasoning_widget.document().setTextWidth(TEXT_WIDTH)
+            reasoning_widget._text_width = TEXT_WIDTH
+            reasoning_widget._margin2 = reasoning_widget.document().documentMargin() * 2
 
             # 折叠/展开事件：进入时自适应高度；空内容显示最小高度
             self.reasoning_toggle_button.toggled.connect(
-                lambda checked: (
-                    reasoning_widget.setVisible(checked),
-                    (
-                        # 空内容：最小高度
-                        (reasoning_widget.setFixedHeight(40), reasoning_widget.updateGeometry())
-                        if not reasoning_widget.toPlainText().strip()
-                        else (
-                            # 非空内容：按文档高度计算（使用稳定的文本宽度）
-                            reasoning_widget.document().setTextWidth((FIXED_WIDTH - 20) - 10),
-                            reasoning_widget.setFixedHeight(
-                                max(40, min(int(
-                                    reasoning_widget.document().size().height()
-                                    + reasoning_widget.document().documentMargin() * 2
-                                ), 200))
-                            ),
-                            reasoning_widget.updateGeometry()
-                        )
-                    ) if checked else None
-                )
+                partial(self._on_reasoning_toggled, widget=reasoning_widget)
             )
 
-            # 内容变化时自适应高度（仅在可见时调整，避免折叠状态抖动）
-            reasoning_widget.textChanged.connect(
-                lambda: None if not reasoning_widget.isVisible() else (
-                    (reasoning_widget.setFixedHeight(40), reasoning_widget.updateGeometry())
-                    if not reasoning_widget.toPlainText().strip()
-                    else (
-                        reasoning_widget.document().setTextWidth((FIXED_WIDTH - 20) - 10),
-                        reasoning_widget.setFixedHeight(
-                            max(40, min(int(
-                                reasoning_widget.document().size().height()
-                                + reasoning_widget.document().documentMargin() * 2
-                            ), 200))
-                        ),
-                        reasoning_widget.updateGeometry()
-                    )
-                )
-            )
+            # 内容变化时自适应高度（合并 33ms 内的多次变化）：仅在展开时连接，折叠流式期间不触发任何回调
+            reasoning_widget._resize_slot = partial(self._schedule_reasoning_resize, reasoning_widget)
+            reasoning_widget._resize_connected = False
+            # 历史消息的思考内容：首次展开前仅保存文本，不写入文档（见 _on_reasoning_toggled）
+            reasoning_widget._deferred_text = None
             
             container_layout.addWidget(self.reasoning_toggle_button)
             container_layout.addWidget(reasoning_widget)
@@ -2229,39 +2515,31 @@ class ChatWindow(QWidget):
             ai_content_widget.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.MinimumExpanding)
             
             # 设置QTextEdit固定宽度（减去padding和margin）
-            content_width = FIXED_WIDTH - 20  # 减去padding
             ai_content_widget.setFixedWidth(content_width)
             
             # 设置文档的固定宽度
             ai_content_widget.document().setTextWidth(content_width - 10)
             
-            # 设置QTextEdit样式
-            ai_content_widget.setStyleSheet("""
-                QTextEdit {
-                    background-color: transparent;
-                    color: white;
-                    font-size: 14px;
-                    border: none;
-                    margin: 0px;
-                    padding: 0px;
-                    width: %dpx;
-                }
-            """ % content_width)
-            
-            # 设置文档样式
-            ai_content_widget.document().setDefaultStyleSheet("""
-                body {
-                    margin: 0;
-                    padding: 0;
-                    line-height: 1.4;
-                    font-family: inherit;
-                    width: %dpx;
-                    word-wrap: break-word;
-                    overflow-wrap: break-word;
-                }
-            """ % (content_width - 10))
+            # 设置QTextEdit样式（仅控件级样式；正文以纯文本写入，不再为文档设置 HTML 默认样式表）
+            ai_content_widget.setStyleSheet(self._AI_CONTENT_QSS)
+            ai_content_widget.setAcceptRichText(False)
             
             message_layout.addWidget(ai_content_widget)
+            # 离屏清空时暂存的正文片段（见 _update_offscreen_messages）
+            ai_content_widget._deferred_fragment = None
+
+            # 维护粘底标志（仅在滚动条值变化时更新），并挂载常驻追加光标
+            for streaming_widget in (reasoning_widget, ai_content_widget):
+                self._track_sticky_bottom(streaming_widget)
+                self._attach_append_cursor(streaming_widget)
+                # 只读控件无需撤销栈，避免每次插入记录撤销命令（消息正文不设段落上限，以免截断内容）
+                streaming_widget.document().setUndoRedoEnabled(False)
+
+            # 订阅文档尺寸变化：仅在文档高度真正变化时调整正文高度（+10）
+            # 思考区高度只由 _resize_reasoning 决定（展开时经 textChanged 蹦床触发），折叠期间不做任何调整
+            ai_content_widget.document().documentLayout().documentSizeChanged.connect(
+                partial(self._on_doc_size_changed, ai_content_widget, 10)
+            )
             
             # print("AI消息组件创建完成")  # 调试：组件创建结束
             # 返回组件和子组件的引用
@@ -2271,6 +2549,139 @@ class ChatWindow(QWidget):
                 f"AI消息组件创建失败：构建子组件或绑定事件时发生异常。可能原因：控件初始化失败或样式/宽度设置不合法；期望值：成功实例化的控件与有效参数。错误详情：{e}"
             )
 
+    def _on_reasoning_toggled(self, checked, widget=None):
+        """
+        “思考过程”按钮切换：展开时显示（首次展开时填充延迟的历史思考内容）、连接 textChanged 并自适应高度；折叠时隐藏并断开 textChanged。
+        Args:
+            checked (bool): 按钮是否选中（展开）
+            widget (QTextEdit): 对应的思考内容控件
+        """
+        widget.setVisible(checked)
+        if not checked:
+            if widget._resize_connected:
+                widget.textChanged.disconnect(widget._resize_slot)
+                widget._resize_connected = False
+            return
+        if widget._deferred_text is not None:
+            # 首次展开历史思考内容：此时才填充文档并排版
+            widget.setPlainText(widget._deferred_text)
+            widget._deferred_text = None
+        if not widget._resize_connected:
+            widget.textChanged.connect(widget._resize_slot)
+            widget._resize_connected = True
+        self._resize_reasoning(widget)
+
+    def _resize_reasoning(self, reasoning_widget):
+        """
+        按文档高度自适应思考区域高度：空内容固定最小高度 40；非空内容介于 40 与 200 之间。
+        Args:
+            reasoning_widget (QTextEdit): 思考内容控件
+        """
+        if not reasoning_widget.toPlainText().strip():
+            height = 40
+        else:
+            # 文档边距在构造时已缓存为 _margin2
+            height = max(40, min(int(reasoning_widget.document().size().height() + reasoning_widget._margin2), 200))
+        # 与当前固定高度一致时跳过，避免无效的几何更新
+        if height != reasoning_widget.maximumHeight():
+            reasoning_widget.setFixedHeight(height)
+            reasoning_widget.updateGeometry()
+
+    def _schedule_reasoning_resize(self, reasoning_widget):
+        """
+        textChanged 蹦床：仅在控件可见且无待执行调整时，登记一次 33ms 后的高度调整。
+        Args:
+            reasoning_widget (QTextEdit): 思考内容控件
+        """
+        if getattr(reasoning_widget, "_resize_pending", False) or not reasoning_widget.isVisible():
+            return
+        reasoning_widget._resize_pending = True
+        QTimer.singleShot(33, partial(self._run_reasoning_resize, reasoning_widget))
+
+    def _run_reasoning_resize(self, reasoning_widget):
+        """执行已登记的思考区域高度调整（控件可能已在等待期间被删除）"""
+        try:
+            reasoning_widget._resize_pending = False
+            if reasoning_widget.isVisible():
+                self._resize_reasoning(reasoning_widget)
+        except RuntimeError:
+            # 底层 C++ 对象已销毁（消息被删除），忽略本次调整
+            pass
+
+    def _on_doc_size_changed(self, widget, padding, size):
+        """
+        文档尺寸变化回调：与缓存的文档高度比较，仅在变化 ≥1px 时调整控件高度。
+        Args:
+            widget (QTextEdit): 目标文本控件
+            padding (int): 在文档高度之上附加的边距
+            size (QSizeF): 新的文档尺寸
+        """
+        # 功能：替代每个流式块后的 document.size() 同步布局查询；异常统一通过 _on_error_occurred 显示
+        try:
+            if getattr(widget, "_deferred_fragment", None) is not None:
+                # 离屏清空期间保持原有固定高度
+                return
+            doc_height = int(size.height())
+            if doc_height == getattr(widget, "_last_h", None):
+                return
+            widget._last_h = doc_height
+            height = doc_height + padding
+            if widget is self.current_ai_content_widget and self.statu == "running":
+                # 流式期间按 1.5 倍几何增长预分配高度：仅在超出已分配高度时调整，结束时再收紧为精确值
+                if height <= getattr(widget, "_current_alloc_h", 0):
+                    return
+                height = int(doc_height * 1.5) + 40
+                widget._current_alloc_h = height
+            widget.setFixedHeight(height)
+        except Exception as e:
+            self._on_error_occurred(
+                f"调整文本区域高度失败：{type(e).__name__}：{e}。"
+                f"期望：widget 为有效的 QTextEdit，size 为 QSizeF。"
+            )
+
+    def _trim_streaming_height(self):
+        """流式结束后将当前正文区的预分配高度收紧为精确的文档高度"""
+        widget = self.current_ai_content_widget
+        if not widget:
+            return
+        height = int(widget.document().size().height()) + 10
+        widget._current_alloc_h = height
+        if height != widget.maximumHeight():
+            widget.setFixedHeight(height)
+
+    def _run_height_adjusts(self):
+        """
+        批量调整已登记正文控件的高度，分三层执行：
+        1) 读取全部文档布局高度（文本宽度已在构造时固定）；2) 统一 setFixedHeight；3) 仅对消息容器执行一次 updateGeometry。
+        """
+        # 功能：将 N 次“读-写-几何更新”合并为一次布局失效；异常统一通过 _on_error_occurred 显示
+        widgets = self._pending_height_adjusts
+        self._pending_height_adjusts = []
+        try:
+            # 第一层：读取（等待期间被删除的控件跳过）
+            heights = []
+            for widget in widgets:
+                try:
+                    if getattr(widget, "_deferred_fragment", None) is not None:
+                        continue
+                    heights.append((widget, int(widget.document().documentLayout().documentSize().height()) + 10))
+                except RuntimeError:
+                    continue
+
+            # 第二层：写入
+            for widget, height in heights:
+                if height != widget.maximumHeight():
+                    widget.setFixedHeight(height)
+
+            # 第三层：几何更新仅一次（消息容器即滚动区的内容控件，更新会沿父链传播）
+            if heights:
+                self.message_container.updateGeometry()
+        except Exception as e:
+            self._on_error_occurred(
+                f"批量调整消息高度失败：{type(e).__name__}：{e}。"
+                f"期望：已登记的控件为有效的 QTextEdit，消息容器与滚动区可访问。"
+            )
+
     def _create_streaming_ai_message(self):
         """创建用于流式输出的AI消息容器，支持思考内容和正式回复"""
         # 功能：创建并插入流式AI消息组件，然后刷新滚动区域；异常统一通过 _on_error_occurred 显示
@@ -2311,14 +2722,10 @@ class ChatWindow(QWidget):
                     if isinstance(content, tuple) and len(content) == 2:
                         reasoning_content, main_content = content
 
-                        # 填充思考区域（如果有思考内容）
+                        # 登记思考内容（如果有）：思考区默认折叠，文档填充与排版推迟到首次展开
                         if reasoning_content:
-                            reasoning_widget.setPlainText(reasoning_content)
-                            # 调整思考区域高度
-                            reasoning_doc = reasoning_widget.document()
-                            reasoning_height = reasoning_doc.size().height()
-                            reasoning_widget.setFixedHeight(int(reasoning_height) + 10)
-                            # print("AI思考区域填充并调整高度完成")  # 调试：思考区更新
+                            reasoning_widget._deferred_text = reasoning_content
+                            # print("AI思考内容已登记，待展开时填充")  # 调试：思考区延迟填充
 
                         # 填充主要内容区域
                         ai_content_widget.setPlainText(main_content)
@@ -2328,15 +2735,10 @@ class ChatWindow(QWidget):
                         ai_content_widget.setPlainText(str(content))
                         # print("采用旧格式填充AI内容")  # 调试：旧格式兼容路径
 
-                    # 调整内容区域高度
-                    def adjust_height():
-                        document = ai_content_widget.document()
-                        height = document.size().height()
-                        ai_content_widget.setFixedHeight(int(height) + 10)
-                        message_widget.updateGeometry()
-                        self.message_container.updateGeometry()
-
-                    QTimer.singleShot(10, adjust_height)
+                    # 调整内容区域高度：登记到批量队列，由 _run_height_adjusts 统一处理
+                    self._pending_height_adjusts.append(ai_content_widget)
+                    if not self._height_adjust_timer.isActive():
+                        self._height_adjust_timer.start()
                     # print("已安排内容高度调整")  # 调试：UI更新排队
             else:
                 # 用户消息：使用原有逻辑
@@ -2349,17 +2751,7 @@ class ChatWindow(QWidget):
                 if sender_name:
                     sender_label = QLabel(sender_name)
                     sender_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-                    sender_label.setStyleSheet("""
-                        QLabel {
-                            background-color: transparent;
-                            color: rgba(255, 255, 255, 0.8);
-                            font-size: 12px;
-                            font-weight: bold;
-                            margin: 0px;
-                            padding: 0px;
-                            border: none;
-                        }
-                    """)
+                    sender_label.setStyleSheet(self._SENDER_LABEL_QSS)
                     message_layout.addWidget(sender_label)
                     # print(f"已添加发送者标签: {sender_name}")  # 调试：用户消息显示发送者
 
@@ -2367,21 +2759,9 @@ class ChatWindow(QWidget):
                 content_widget = QLabel(content)
                 content_widget.setWordWrap(True)
                 content_widget.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.MinimumExpanding)
-                content_widget.setMaximumHeight(16777215)
-                content_widget.setMinimumHeight(0)
                 content_widget.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
                 content_widget.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
-                content_widget.setStyleSheet("""
-                    QLabel {
-                        background-color: transparent;
-                        color: white;
-                        font-size: 14px;
-                        line-height: 1.4;
-                        margin: 0px;
-                        padding: 0px;
-                        border: none;
-                    }
-                """)
+                content_widget.setStyleSheet(self._USER_LABEL_QSS)
 
                 message_layout.addWidget(content_widget)
 
@@ -2400,7 +2780,7 @@ class ChatWindow(QWidget):
                 f"期望：有效的消息组件和内容格式。"
             )
 
-    def add_message(self, content, message_type="user", sender_name=None):
+    def add_message(self, content, message_type="user", sender_name=None, refresh=True):
         """
         添加消息函数 - 仅用于用户消息和加载聊天记录
         
@@ -2408,6 +2788,7 @@ class ChatWindow(QWidget):
             content (str): 消息内容
             message_type (str): 消息类型 - 仅支持 "user" 和 "ai"（用于加载历史记录）
             sender_name (str): 发送者名称（可选，用于自定义显示）
+            refresh (bool): 是否立即刷新滚动区；批量加载历史时传 False，由调用方统一刷新一次
         """
         # 功能：将消息按类型创建、填充并插入布局，然后刷新滚动区；异常统一通过 _on_error_occurred 显示
         # 只处理用户消息和历史AI消息
@@ -2424,12 +2805,8 @@ class ChatWindow(QWidget):
                 # 将消息添加到布局
                 item_count = self.message_layout.count()
                 if item_count > 0:
-                    # 移除最后的弹性空间
-                    stretch_item = self.message_layout.takeAt(item_count - 1)
-                    # 添加消息组件
-                    self.message_layout.addWidget(ai_message_widget)
-                    # 重新添加弹性空间
-                    self.message_layout.addStretch()
+                    # 直接插入到最后的弹性空间之前，避免移除并重建弹性空间
+                    self.message_layout.insertWidget(item_count - 1, ai_message_widget)
                     # print("AI消息插入布局（存在弹性空间）")  # 调试：布局插入路径A
                 else:
                     self.message_layout.addWidget(ai_message_widget)
@@ -2457,12 +2834,8 @@ class ChatWindow(QWidget):
                 # 推入布局
                 item_count = self.message_layout.count()
                 if item_count > 0:
-                    # 移除最后的弹性空间
-                    stretch_item = self.message_layout.takeAt(item_count - 1)
-                    # 添加消息组件
-                    self.message_layout.addWidget(message_widget)
-                    # 重新添加弹性空间
-                    self.message_layout.addStretch()
+                    # 直接插入到最后的弹性空间之前，避免移除并重建弹性空间
+                    self.message_layout.insertWidget(item_count - 1, message_widget)
                     # print("用户消息插入布局（存在弹性空间）")  # 调试：布局插入路径A
                 else:
                     self.message_layout.addWidget(message_widget)
@@ -2472,8 +2845,9 @@ class ChatWindow(QWidget):
                 # 设置对齐方式
                 self.message_layout.setAlignment(message_widget, Qt.AlignmentFlag.AlignRight)
 
-            # 刷新滚动区
-            self._refresh_scroll_area()
+            # 刷新滚动区（批量加载时由调用方统一刷新）
+            if refresh:
+                self._refresh_scroll_area()
             # print("消息添加完成并刷新滚动区")  # 调试：总流程完成
         except Exception as e:
             self._on_error_occurred(
@@ -2481,31 +2855,38 @@ class ChatWindow(QWidget):
                 f"期望：message_type 为 'user' 或 'ai'，content 为可显示文本，布局与组件有效。"
             )
 
-    def _refresh_scroll_area(self):
+    def _refresh_scroll_area(self, streaming=False):
         """
         刷新滚动区域。
-        - 总是刷新布局与几何；
+        - 仅在几何“脏”标志置位时更新布局几何（结构性变化总是置位；流式写入每帧最多置位一次）；
+        - 不调用 processEvents/adjustSize，避免流式期间重入事件循环与整列重排；
         - 若处于“粘底”状态，仅在接近底部时自动滚到最底；
         - 避免用户向上滚动时被强制拉回底部。
+        Args:
+            streaming (bool): 是否来自流式写入路径（此时是否更新几何由 _geom_dirty 决定）
         """
         # 功能：刷新消息容器几何，并在需要时自动滚动到底部；异常统一通过 _on_error_occurred 显示
+        # 防重入：同一刷新过程内直接返回（在 try 之外判断，避免 finally 提前释放外层的标志）
+        if self._refreshing_scroll:
+            return
+        self._refreshing_scroll = True
         try:
-            # 刷新布局
-            self.message_container.adjustSize()
-            self.message_container.updateGeometry()
-            self.message_area.updateGeometry()
-            QApplication.processEvents()
-            # print("已刷新消息容器与滚动区几何")  # 调试：布局刷新
+            if not streaming:
+                self._geom_dirty = True
+            # 刷新布局几何（仅在需要时）
+            if self._geom_dirty:
+                self._geom_dirty = False
+                self.message_container.updateGeometry()
+                self.message_area.updateGeometry()
+                # print("已刷新消息容器与滚动区几何")  # 调试：布局刷新
 
             # 根据“粘底”状态决定是否自动到底
-            if getattr(self, "_stick_to_bottom", True):
+            if self._stick_to_bottom:
                 sb = self.message_area.verticalScrollBar()
                 # 再次确认当前是否接近底部（防止布局重算时误判）
                 if (sb.maximum() - sb.value()) <= 20:
-                    sb.setValue(sb.maximum())
-                    QTimer.singleShot(0, lambda: self.message_area.verticalScrollBar().setValue(
-                        self.message_area.verticalScrollBar().maximum()
-                    ))
+                    # 仅排队一次到底滚动（由 UI 泵在布局完成后执行），不在布局中途同步 setValue
+                    self._schedule_ui_pump(scroll_to_bottom=True)
                     # print("自动滚动到最底部")  # 调试：粘底触发
         except AttributeError as e:
             self._on_error_occurred(
@@ -2517,52 +2898,202 @@ class ChatWindow(QWidget):
                 f"刷新滚动区域时发生未预期错误：{type(e).__name__}：{e}。"
                 f"期望：滚动条状态可访问，几何更新成功。"
             )
-        try:
-            # 防重入：同一刷新过程内直接返回
-            if getattr(self, "_refreshing_scroll", False):
-                return
-            self._refreshing_scroll = True
-
-            # 刷新布局几何（无需强制 processEvents）
-            self.message_container.adjustSize()
-            self.message_container.updateGeometry()
-            self.message_area.updateGeometry()
-
-            # 根据“粘底”状态决定是否自动到底
-            if getattr(self, "_stick_to_bottom", True):
-                sb = self.message_area.verticalScrollBar()
-                # 再次确认当前是否接近底部（防止布局重算时误判）
-                if (sb.maximum() - sb.value()) <= 20:
-                    sb.setValue(sb.maximum())
-                    QTimer.singleShot(0, lambda: self.message_area.verticalScrollBar().setValue(
-                        self.message_area.verticalScrollBar().maximum()
-                    ))
         finally:
             # 释放防重入标志
             self._refreshing_scroll = False
 
+    def _attach_append_cursor(self, widget):
+        """
+        为流式文本控件挂载一个常驻的文档末尾光标（widget._append_cursor），避免每个文本块新建 QTextCursor。
+        Args:
+            widget (QTextEdit): 流式追加内容的文本控件
+        """
+        cursor = QTextCursor(widget.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.setKeepPositionOnInsert(False)
+        widget._append_cursor = cursor
+
+    def _append_at_end(self, widget, text):
+        """
+        通过常驻光标在文档末尾插入文本；若文档被 clear/setPlainText 重置导致光标不在末尾，则先移回末尾。
+        Args:
+            widget (QTextEdit): 已挂载 _append_cursor 的文本控件
+            text (str): 待插入文本
+        """
+        cursor = widget._append_cursor
+        if not cursor.atEnd():
+            cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
+    def _sync_plain_text(self, widget, text):
+        """
+        将文本控件内容同步为 text：若当前内容是 text 的前缀，仅在末尾插入差量（O(差量)），否则回退为整体 setPlainText。
+        Args:
+            widget (QTextEdit): 已挂载 _append_cursor 的文本控件
+            text (str): 目标完整文本
+        """
+        current = widget.toPlainText()
+        if current == text:
+            return
+        if current and text.startswith(current):
+            self._append_at_end(widget, text[len(current):])
+        else:
+            widget.setPlainText(text)
+
+    def _track_sticky_bottom(self, widget):
+        """
+        为流式文本控件维护 _stickyBottom 标志：初始为 True，此后仅在其滚动条值变化时更新。
+        同时缓存滚动条引用为 widget._vsb，并以 _sb_max/_sb_val 缓存滚动条最大值与当前值
+        （分别由 rangeChanged/valueChanged 刷新），流式插入路径直接比较 Python 整数而不回调 Qt。
+        Args:
+            widget (QTextEdit): 流式追加内容的文本控件
+        """
+        sb = widget.verticalScrollBar()
+        widget._vsb = sb
+        widget._sb_max = sb.maximum()
+        widget._sb_val = sb.value()
+        widget._stickyBottom = True
+        sb.rangeChanged.connect(partial(self._on_text_scroll_range_changed, widget))
+        sb.valueChanged.connect(partial(self._on_text_scroll_value_changed, widget))
+
+    def _on_text_scroll_range_changed(self, widget, minimum, maximum):
+        """
+        文本控件滚动条范围变化：刷新缓存的最大值。
+        Args:
+            widget (QTextEdit): 对应的文本控件
+            minimum (int): 滚动条最小值（未使用）
+            maximum (int): 滚动条最大值
+        """
+        widget._sb_max = maximum
+
+    def _on_text_scroll_value_changed(self, widget, value):
+        """
+        文本控件滚动条值变化：距离底部 ≤20px 视为粘底。
+        Args:
+            widget (QTextEdit): 对应的文本控件
+            value (int): 当前滚动条值
+        """
+        widget._sb_val = value
+        widget._stickyBottom = (widget._sb_max - value) <= 20
+
+    def _schedule_ui_pump(self, refresh=False, scroll_to_bottom=False, streaming=False):
+        """
+        登记延后执行的 UI 工作，并启动共享泵定时器（已在运行则直接复用）。
+        Args:
+            refresh (bool): 是否需要刷新滚动区域
+            scroll_to_bottom (bool): 是否需要将外层滚动区滚动到底部
+            streaming (bool): 刷新是否来自流式写入；否则视为结构性刷新，执行时强制更新布局几何
+        """
+        if refresh:
+            self._pending_refresh_scroll = True
+            if not streaming:
+                self._pending_refresh_full = True
+        if scroll_to_bottom:
+            self._pending_scroll_to_bottom = True
+        if not self._ui_pump_timer.isActive():
+            self._ui_pump_timer.start()
+
+    def _update_offscreen_messages(self):
+        """
+        延迟渲染：视口上下 2 屏以外的 AI 正文清空文档（内容以 QTextDocumentFragment 暂存在控件上），
+        进入该范围时恢复。当前绑定的（可能正在流式写入的）正文控件始终保留。
+        """
+        # 功能：使保持排版的文档数量与可见消息数相当；异常统一通过 _on_error_occurred 显示
+        try:
+            viewport_height = self.message_area.viewport().rect().height()
+            top = self.message_area.verticalScrollBar().value()
+            band_top = top - 2 * viewport_height
+            band_bottom = top + 3 * viewport_height
+            layout = self.message_layout
+            for index in range(layout.count() - 1):  # 最后一个是stretch
+                item = layout.itemAt(index)
+                message_widget = item.widget() if item else None
+                content_widget = getattr(message_widget, 'ai_content_widget', None)
+                if content_widget is None or content_widget is self.current_ai_content_widget:
+                    continue
+                geometry = message_widget.geometry()
+                if geometry.bottom() < band_top or geometry.top() > band_bottom:
+                    self._dematerialize_content(content_widget)
+                else:
+                    self._materialize_content(content_widget)
+        except Exception as e:
+            self._on_error_occurred(
+                f"更新离屏消息渲染状态失败：{type(e).__name__}：{e}。"
+                f"期望：消息布局中的 AI 消息组件挂载有效的 ai_content_widget。"
+            )
+
+    def _dematerialize_content(self, widget):
+        """将正文文档暂存为片段并清空（保持控件固定高度不变）"""
+        if widget._deferred_fragment is not None:
+            return
+        document = widget.document()
+        if document.isEmpty():
+            return
+        # 先登记片段再清空，使 clear 触发的 documentSizeChanged 被忽略
+        widget._deferred_fragment = QTextDocumentFragment(document)
+        document.clear()
+
+    def _materialize_content(self, widget):
+        """将暂存的片段写回正文文档（文档高度与清空前一致，不会触发高度调整）"""
+        fragment = widget._deferred_fragment
+        if fragment is None:
+            return
+        widget._deferred_fragment = None
+        QTextCursor(widget.document()).insertFragment(fragment)
+
+    def _pump_pending_ui(self):
+        """共享泵定时器回调：一次性执行所有已登记的 UI 工作，然后停止定时器"""
+        # 功能：先停表并清空标志，再执行刷新与滚动；执行期间新登记的工作会重新启动定时器
+        self._ui_pump_timer.stop()
+        refresh = self._pending_refresh_scroll
+        refresh_full = self._pending_refresh_full
+        scroll_to_bottom = self._pending_scroll_to_bottom
+        self._pending_refresh_scroll = False
+        self._pending_refresh_full = False
+        self._pending_scroll_to_bottom = False
+        try:
+            if refresh:
+                # 合并的请求中只要有一次结构性刷新，就按非流式模式执行
+                self._refresh_scroll_area(streaming=not refresh_full)
+            if scroll_to_bottom:
+                sb = self.message_area.verticalScrollBar()
+                sb.setValue(sb.maximum())
+        except Exception as e:
+            self._on_error_occurred(
+                f"执行延后 UI 更新失败：{type(e).__name__}：{e}。"
+                f"期望：消息滚动区域及其滚动条可访问。"
+            )
+
     def _on_main_scroll_value_changed(self, value):
         """
-        维护外层滚动区的“粘底”状态：
-        - 当滚动条接近底部（<=20px）时，启用粘底（自动到底）；
-        - 当用户向上滚动超过阈值时，关闭粘底（不自动拉回底部）。
+        外层滚动条值变化：仅记录最新值，由 16ms 单次定时器合并处理（见 _apply_main_scroll_state）。
         Args:
             value (int): 当前滚动条值
         """
-        # 功能：根据滚动条位置维护 _stick_to_bottom 标志；异常统一通过 _on_error_occurred 显示
+        # print(f"滚动值变化: {value}")  # 调试：跟踪滚动条当前值
+        self._scroll_value_pending = value
+        if not self._scroll_state_timer.isActive():
+            self._scroll_state_timer.start()
+
+    def _apply_main_scroll_state(self):
+        """
+        维护外层滚动区的“粘底”状态（每 16ms 至多一次）：
+        - 当滚动条接近底部（<=20px）时，启用粘底（自动到底）；
+        - 当用户向上滚动超过阈值时，关闭粘底（不自动拉回底部）。
+        """
+        # 功能：根据最近一次滚动值维护 _stick_to_bottom 标志；异常统一通过 _on_error_occurred 显示
         try:
-            # print(f"滚动值变化: {value}")  # 调试：跟踪滚动条当前值
             sb = self.message_area.verticalScrollBar()
-            self._stick_to_bottom = (sb.maximum() - value) <= 20
+            self._stick_to_bottom = (sb.maximum() - self._scroll_value_pending) <= 20
             # print(f"粘底状态: {self._stick_to_bottom}")  # 调试：粘底状态更新
+            # 滚动停止后再检查离屏消息（重复启动即重新计时）
+            self._lazy_render_timer.start()
         except Exception as e:
             self._on_error_occurred(
                 f"更新粘底状态失败：{type(e).__name__}：{e}。"
-                f"期望：value 为整数，滚动条可访问。"
+                f"期望：滚动值为整数，滚动条可访问。"
             )
 
-    
-
     def update_variables_display(self):
         """更新变量显示区域"""
         # 功能：从 vm 拉取变量数据并刷新展示区域；异常统一通过 _on_error_occurred 显示
@@ -2576,62 +3107,151 @@ class ChatWindow(QWidget):
             self.loaded_variables = all_variables_info
             # print(f"加载变量数量: {len(self.loaded_variables)}")  # 调试：变量加载数量
 
-            # 清空现有的变量显示
-            # 移除所有widget，但保留最后的弹性空间
-            while self.variables_scroll_layout.count() > 1:
-                child = self.variables_scroll_layout.takeAt(0)
-                if child.widget():
-                    child.widget().deleteLater()
+            # 增量刷新：按结构键/数值键选择最小更新路径，未变化的变量不做任何处理
+            var_widgets = self._var_widgets
+            layout = self.variables_scroll_layout
 
-            # 遍历所有变量并显示
-            for var_name, var_info in self.loaded_variables.items():
-                try:
-                    var_widget = self.create_variable_widget(var_info)
-                    # 在弹性空间之前插入变量widget
-                    self.variables_scroll_layout.insertWidget(
-                        self.variables_scroll_layout.count() - 1, var_widget
-                    )
-                    # print(f"变量插入完成: {var_name}")  # 调试：单个变量插入
-                except Exception as e_item:
-                    self._on_error_occurred(
-                        f"插入变量展示失败：{type(e_item).__name__}：{e_item}。"
-                        f"变量名：{var_name}。期望：var_info 为包含必要键的字典。"
-                    )
-                    # 不中断整个更新流程，继续后续变量
+            # 批量更新期间暂停容器重绘并屏蔽其信号，结束后统一重绘一次
+            parent = layout.parentWidget()
+            parent.setUpdatesEnabled(False)
+            blocker = QSignalBlocker(parent)
+            try:
+                # 移除已不存在的变量
+                for var_name in [name for name in var_widgets if name not in all_variables_info]:
+                    widget = var_widgets.pop(var_name)[0]  # 缓存项为 (控件, 结构键, 值键)
+                    layout.removeWidget(widget)
+                    widget.hide()
+                    widget.deleteLater()
+
+                # 新增或更新变量（按 vm 返回顺序放置，弹性空间保持在最后）
+                for index, (var_name, var_info) in enumerate(self.loaded_variables.items()):
+                    try:
+                        struct_key, value_key = self._variable_keys(var_info)
+                        cached = var_widgets.get(var_name)
+                        if cached is None:
+                            var_widget = self.create_variable_widget(var_info)
+                            layout.insertWidget(index, var_widget)
+                            # print(f"变量插入完成: {var_name}")  # 调试：单个变量插入
+                        elif cached[1] != struct_key:
+                            # 结构变化（类型/阶段方式/阶段配置）：整体重建
+                            var_widget = self._rebuild_variable_widget(cached[0], var_info)
+                            # print(f"变量重建完成: {var_name}")  # 调试：结构变化重建
+                        elif cached[2] == value_key:
+                            continue
+                        else:
+                            # 仅数值变化：快速路径原位更新
+                            var_widget = self._apply_value_update(cached[0], var_info)
+                            # print(f"变量更新完成: {var_name}")  # 调试：单个变量原位更新
+                        var_widgets[var_name] = (var_widget, struct_key, value_key)
+                    except Exception as e_item:
+                        self._on_error_occurred(
+                            f"插入变量展示失败：{type(e_item).__name__}：{e_item}。"
+                            f"变量名：{var_name}。期望：var_info 为包含必要键的字典。"
+                        )
+                        # 不中断整个更新流程，继续后续变量
+            finally:
+                blocker.unblock()
+                parent.setUpdatesEnabled(True)
+            parent.update()
         except Exception as e:
             self._on_error_occurred(
                 f"更新变量显示区域失败：{type(e).__name__}：{e}。"
                 f"期望：vm 返回有效变量信息，variables_scroll_layout 可用。"
             )
 
+    def _variable_keys(self, var_info):
+        """
+        计算变量的结构键与数值键，用于判断刷新时需要的最小更新路径。
+        Args:
+            var_info (dict): 变量信息
+        Returns:
+            tuple[tuple, tuple]: (结构键, 数值键)；结构键变化需重建组件，仅数值键变化可原位更新
+        """
+        struct_key = (
+            var_info.get('var_type', 'record'),
+            var_info.get('relative_method'),
+            var_info.get('relative_stage_config'),
+        )
+        value_key = (
+            var_info.get('value', 0),
+            var_info.get('relative_value', 0),
+            var_info.get('relative_current_description', '未知'),
+            var_info.get('relative_name', ''),
+        )
+        return struct_key, value_key
+
+    def _apply_value_update(self, widget, var_info):
+        """
+        结构未变时的快速路径：仅修改标签文本与进度条数值；组件缺少原位更新所需的引用时整体重建。
+        Args:
+            widget (QWidget): create_variable_widget 创建的组件
+            var_info (dict): 新的变量信息
+        Returns:
+            QWidget: 更新后的组件（重建时为新组件）
+        """
+        # 功能：避免删除/重建未变结构的变量组件；异常统一通过 _on_error_occurred 显示
+        try:
+            var_type = getattr(widget, '_var_type', None)
+            if var_type == 'record' and hasattr(widget, '_value_label'):
+                widget._value_label.setText(f"{var_info.get('name', '未知')}: {var_info.get('value', 0)}")
+                return widget
+            if var_type == 'stage_independent' and hasattr(widget, '_relative_label'):
+                name_text, relative_text = self._stage_label_texts(var_info)
+                widget._name_label.setText(name_text)
+                widget._relative_label.setText(relative_text)
+                # 经验条：存在进度条时仅更新数值；无法原位更新时在原位置替换为新建的经验条
+                exp_widget = widget._exp_widget
+                if hasattr(exp_widget, '_progress_bar') and not self.update_experience_bar(exp_widget, var_info):
+                    new_bar = self.create_experience_bar(var_info)
+                    widget.layout().replaceWidget(exp_widget, new_bar)
+                    exp_widget.deleteLater()
+                    widget._exp_widget = new_bar
+                return widget
+            return self._rebuild_variable_widget(widget, var_info)
+        except Exception as e:
+            self._on_error_occurred(
+                f"更新变量展示组件失败：{type(e).__name__}：{e}。"
+                f"期望：widget 为 create_variable_widget 创建的组件，var_info 为包含必要键的字典。"
+            )
+            return widget
+
+    def _rebuild_variable_widget(self, widget, var_info):
+        """
+        结构变化时在同一布局位置重建变量组件。
+        Args:
+            widget (QWidget): 待替换的旧组件
+            var_info (dict): 新的变量信息
+        Returns:
+            QWidget: 新建的组件
+        """
+        new_widget = self.create_variable_widget(var_info)
+        index = self.variables_scroll_layout.indexOf(widget)
+        self.variables_scroll_layout.insertWidget(index, new_widget)
+        self.variables_scroll_layout.removeWidget(widget)
+        widget.hide()
+        widget.deleteLater()
+        return new_widget
+
     def create_variable_widget(self, var_info):
         """创建单个变量的显示widget"""
         # 功能：根据变量类型创建并返回展示组件；异常统一通过 _on_error_occurred 显示
         try:
+            var_type = var_info.get('var_type', 'record')
+            # print(f"创建变量组件，类型: {var_type}")  # 调试：变量类型
+
             var_widget = QFrame()
-            var_widget.setStyleSheet("""
-                QFrame {
-                    background-color: rgba(255, 255, 255, 0.05);
-                    border: 1px solid rgba(255, 255, 255, 0.1);
-                    border-radius: 4px;
-                    padding: 8px;
-                    margin: 2px;
-                }
-            """)
+            var_widget.setProperty("role", "var")  # 样式见 _VARIABLES_QSS
+            var_widget._var_type = var_type
 
+            # 布局参数为类级常量，所有变量组件共用
             var_layout = QVBoxLayout(var_widget)
-            var_layout.setContentsMargins(4, 4, 4, 4)
-            var_layout.setSpacing(4)
-
-            var_type = var_info.get('var_type', 'record')
-            # print(f"创建变量组件，类型: {var_type}")  # 调试：变量类型
+            var_layout.setContentsMargins(*self._VAR_LAYOUT_MARGINS)
+            var_layout.setSpacing(self._VAR_LAYOUT_SPACING)
 
-            if var_type == 'record':
-                # 记录变量：name: value
-                self.create_record_variable_display(var_layout, var_info)
-            elif var_type == 'stage_independent':
-                # 阶段变量：三行显示
-                self.create_stage_variable_display(var_layout, var_info)
+            # 按变量类型查表填充：记录变量为“name: value”，阶段变量为三行显示
+            display = self._VAR_DISPLAY.get(var_type)
+            if display:
+                display(var_layout, var_info)
 
             return var_widget
         except Exception as e:
@@ -2653,16 +3273,10 @@ class ChatWindow(QWidget):
 
             # name: value 格式
             label = QLabel(f"{name}: {value}")
-            label.setStyleSheet("""
-                QLabel {
-                    color: #FFFFFF;
-                    font-size: 12px;
-                    background-color: transparent;
-                    border: none;
-                    padding: 2px;
-                }
-            """)
+            label.setProperty("role", "record")
             layout.addWidget(label)
+            # 挂载到所属变量组件，供原位更新使用
+            layout.parentWidget()._value_label = label
             # print(f"记录变量显示完成: {name}={value}")  # 调试：记录变量添加
         except Exception as e:
             self._on_error_occurred(
@@ -2670,40 +3284,33 @@ class ChatWindow(QWidget):
                 f"期望：var_info 至少包含 'name' 与 'value'。"
             )
 
+    def _stage_label_texts(self, var_info):
+        """
+        生成阶段变量的两行文本。
+        Args:
+            var_info (dict): 阶段变量信息
+        Returns:
+            tuple[str, str]: ("name: value", "relative_name: 描述 (阶段值)")
+        """
+        name = var_info.get('name', '未知')
+        value = var_info.get('value', 0)
+        relative_name = var_info.get('relative_name', '')
+        relative_value = var_info.get('relative_value', 0)
+        relative_current_description = var_info.get('relative_current_description', '未知')
+
+        formatted_relative_value = _format_variable_value(relative_value)
+        formatted_description = _format_variable_value(relative_current_description)
+        return f"{name}: {value}", f"{relative_name}: {formatted_description} ({formatted_relative_value})"
+
     def create_stage_variable_display(self, layout, var_info):
         """创建阶段变量的显示"""
         # 功能：以三行形式展示阶段型变量（名称、经验条、相对描述）；异常统一通过 _on_error_occurred 显示
         try:
-            name = var_info.get('name', '未知')
-            value = var_info.get('value', 0)
-            relative_name = var_info.get('relative_name', '')
-            relative_value = var_info.get('relative_value', 0)
-            relative_current_description = var_info.get('relative_current_description', '未知')
-
-            # 格式化显示值 - 直接在此处处理
-            def format_value(val):
-                if isinstance(val, tuple):
-                    return "-".join(str(item) for item in val)
-                elif isinstance(val, (list, set)):
-                    return "-".join(str(item) for item in val)
-                else:
-                    return str(val)
-
-            formatted_relative_value = format_value(relative_value)
-            formatted_description = format_value(relative_current_description)
+            name_text, relative_text = self._stage_label_texts(var_info)
 
             # 第一行：name: value
-            name_label = QLabel(f"{name}: {value}")
-            name_label.setStyleSheet("""
-                QLabel {
-                    color: #FFFFFF;
-                    font-size: 12px;
-                    font-weight: bold;
-                    background-color: transparent;
-                    border: none;
-                    padding: 2px;
-                }
-            """)
+            name_label = QLabel(name_text)
+            name_label.setProperty("role", "stageName")
             layout.addWidget(name_label)
 
             # 第二行：经验条
@@ -2711,62 +3318,104 @@ class ChatWindow(QWidget):
             layout.addWidget(progress_widget)
 
             # 第三行：relative_name: relative_current_description (relative_value)
-            relative_label = QLabel(f"{relative_name}: {formatted_description} ({formatted_relative_value})")
-            relative_label.setStyleSheet("""
-                QLabel {
-                    color: rgba(255, 255, 255, 0.8);
-                    font-size: 11px;
-                    background-color: transparent;
-                    border: none;
-                    padding: 2px;
-                }
-            """)
+            relative_label = QLabel(relative_text)
+            relative_label.setProperty("role", "stageRel")
             layout.addWidget(relative_label)
-            # print(f"阶段变量显示完成: {name}, 阶段值: {relative_value}")  # 调试：阶段变量添加
+
+            # 挂载到所属变量组件，供原位更新使用
+            var_widget = layout.parentWidget()
+            var_widget._name_label = name_label
+            var_widget._exp_widget = progress_widget
+            var_widget._relative_label = relative_label
+            # print(f"阶段变量显示完成: {name_text}")  # 调试：阶段变量添加
         except Exception as e:
             self._on_error_occurred(
                 f"创建阶段变量显示失败：{type(e).__name__}：{e}。"
                 f"期望：var_info 包含 name、value、relative_* 等键的有效数据。"
             )
 
+    def _experience_bar_params(self, var_info):
+        """
+        计算经验条的显示参数。
+        Args:
+            var_info (dict): 阶段变量信息
+        Returns:
+            tuple | None: (当前值, 经验条最大值, 最大值显示文本, 是否最后阶段)；不需要经验条时返回 None
+        """
+        # 检查是否为阶段变量且为LADDER模式
+        relative_method = var_info.get('relative_method')
+        if relative_method != 'ladder':  # 只有ladder模式才显示经验条
+            return None
+
+        # 获取必要的数据
+        current_value = var_info.get('value', 0)
+        relative_value = var_info.get('relative_value', 0)
+        relative_stage_config = var_info.get('relative_stage_config', ())
+
+        if not relative_stage_config:
+            # 没有配置数据
+            return None
+
+        # 判断是否为最后阶段：超过所有阈值的阶段
+        is_last_stage = relative_value == len(relative_stage_config)
+
+        # 计算经验条的最大值
+        if is_last_stage:
+            # 最后阶段：使用最后一个阈值的十倍作为"无限"显示
+            stage_exp_max = relative_stage_config[-1] * 10
+            display_max = "∞"
+        else:
+            # 普通阶段：使用当前阶段对应的阈值
+            if relative_value < len(relative_stage_config):
+                stage_exp_max = relative_stage_config[relative_value]
+                display_max = f"{stage_exp_max:.1f}"
+            else:
+                stage_exp_max = 100.0
+                display_max = "100.0"
+        return current_value, stage_exp_max, display_max, is_last_stage
+
+    def update_experience_bar(self, exp_widget, var_info):
+        """
+        原位更新经验条：仅设置进度条的最大值、当前值与显示文本；阶段颜色仅在“是否最后阶段”翻转时重新应用。
+        Args:
+            exp_widget (QWidget): create_experience_bar 返回的组件
+            var_info (dict): 新的阶段变量信息
+        Returns:
+            bool: 是否已原位更新（False 表示需要调用方重建经验条）
+        """
+        progress_bar = getattr(exp_widget, '_progress_bar', None)
+        if progress_bar is None:
+            return False
+        try:
+            params = self._experience_bar_params(var_info)
+        except (TypeError, ValueError, IndexError):
+            return False
+        if params is None:
+            return False
+        current_value, stage_exp_max, display_max, is_last_stage = params
+
+        progress_bar.setMaximum(int(stage_exp_max * 10))  # 乘以10支持小数精度
+        progress_bar.setValue(int(current_value * 10))
+        progress_bar.setFormat(f"{current_value:.1f}/{display_max}")
+        if is_last_stage != exp_widget._is_last_stage:
+            # 金色/绿色切换：更新属性后重新 polish，使 _VARIABLES_QSS 中的属性选择器生效
+            exp_widget._is_last_stage = is_last_stage
+            progress_bar.setProperty("stage", "last" if is_last_stage else "normal")
+            progress_bar.style().unpolish(progress_bar)
+            progress_bar.style().polish(progress_bar)
+        return True
+
     def create_experience_bar(self, var_info):
         """创建经验条 - 只有LADDER模式的阶段变量才显示经验条"""
         # 功能：根据相对阶段配置创建 QProgressBar；异常统一通过 _on_error_occurred 显示
         try:
-            # 检查是否为阶段变量且为LADDER模式
-            relative_method = var_info.get('relative_method')
-            if relative_method != 'ladder':  # 只有ladder模式才显示经验条
+            params = self._experience_bar_params(var_info)
+            if params is None:
+                # 非 ladder 模式或没有配置数据，返回空widget
                 empty_widget = QWidget()
                 empty_widget.setFixedHeight(0)  # 设置高度为0，不占用空间
                 return empty_widget
-
-            # 获取必要的数据
-            current_value = var_info.get('value', 0)
-            relative_value = var_info.get('relative_value', 0)
-            relative_stage_config = var_info.get('relative_stage_config', ())
-
-            if not relative_stage_config:
-                # 没有配置数据，返回空widget
-                empty_widget = QWidget()
-                empty_widget.setFixedHeight(0)
-                return empty_widget
-
-            # 判断是否为最后阶段：超过所有阈值的阶段
-            is_last_stage = relative_value == len(relative_stage_config)
-
-            # 计算经验条的最大值
-            if is_last_stage:
-                # 最后阶段：使用最后一个阈值的十倍作为"无限"显示
-                stage_exp_max = relative_stage_config[-1] * 10
-                display_max = "∞"
-            else:
-                # 普通阶段：使用当前阶段对应的阈值
-                if relative_value < len(relative_stage_config):
-                    stage_exp_max = relative_stage_config[relative_value]
-                    display_max = f"{stage_exp_max:.1f}"
-                else:
-                    stage_exp_max = 100.0
-                    display_max = "100.0"
+            current_value, stage_exp_max, display_max, is_last_stage = params
 
             # 创建经验条容器
             exp_widget = QWidget()
@@ -2781,46 +3430,16 @@ class ChatWindow(QWidget):
             progress_bar.setValue(int(current_value * 10))
             progress_bar.setFixedHeight(16)
 
-            # 设置进度条样式
-            if is_last_stage:
-                # 最后阶段使用金色
-                progress_bar.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid rgba(255, 255, 255, 0.3);
-                        border-radius: 8px;
-                        background-color: rgba(0, 0, 0, 0.3);
-                        text-align: center;
-                        font-size: 10px;
-                        color: white;
-                    }
-                    QProgressBar::chunk {
-                        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                            stop:0 #FFD700, stop:1 #FFA500);
-                        border-radius: 7px;
-                    }
-                """)
-            else:
-                # 普通阶段使用绿色
-                progress_bar.setStyleSheet("""
-                    QProgressBar {
-                        border: 1px solid rgba(255, 255, 255, 0.3);
-                        border-radius: 8px;
-                        background-color: rgba(0, 0, 0, 0.3);
-                        text-align: center;
-                        font-size: 10px;
-                        color: white;
-                    }
-                    QProgressBar::chunk {
-                        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                            stop:0 #4CAF50, stop:1 #8BC34A);
-                        border-radius: 7px;
-                    }
-                """)
+            # 设置进度条样式：最后阶段金色、普通阶段绿色（样式见 _VARIABLES_QSS）
+            progress_bar.setProperty("stage", "last" if is_last_stage else "normal")
 
             # 设置进度条显示文本
             progress_bar.setFormat(f"{current_value:.1f}/{display_max}")
 
             exp_layout.addWidget(progress_bar)
+            # 缓存进度条与阶段状态，供 update_experience_bar 原位更新
+            exp_widget._progress_bar = progress_bar
+            exp_widget._is_last_stage = is_last_stage
             return exp_widget
         except (TypeError, ValueError) as e:
             self._on_error_occurred(
@@ -2857,20 +3476,21 @@ class ChatWindow(QWidget):
         finally:
             super().closeEvent(event)
 
+@lru_cache(maxsize=None)
 def get_runtime_base() -> Path:
     """
-    返回运行时基目录：
+    返回运行时基目录（进程内不变，首次解析后缓存）：
     - 打包态：返回可执行文件所在目录
     - 开发态：返回项目根目录（gui_pyside6 的上级）
     """
-    import sys
     if getattr(sys, "frozen", False):
         return Path(sys.executable).resolve().parent
     return Path(__file__).resolve().parent.parent
 
+@lru_cache(maxsize=None)
 def get_asset_path(relative_path: str) -> str:
     """
-    返回资源文件的绝对路径。
+    返回资源文件的绝对路径（按相对路径缓存，避免重复解析）。
     - 优先兼容 PyInstaller 单文件模式的临时目录 `sys._MEIPASS`
     - 其次兼容 onedir 模式的可执行文件所在目录
     - 开发态使用项目根目录
@@ -2879,6 +3499,5 @@ def get_asset_path(relative_path: str) -> str:
     返回:
         资源的绝对路径字符串
     """
-    import sys
     base = Path(getattr(sys, "_MEIPASS", get_runtime_base()))
     return str(base / relative_path)
\ No newline at end of file
@@ -1,23 +1,69 @@
 import sys
 import os
+import traceback
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PySide6.QtWidgets import (QApplication, QMainWindow, QDialog, QLineEdit, QPushButton, 
                                QHBoxLayout, QVBoxLayout, QFileDialog, QLabel, QListWidget,
-                               QListWidgetItem, QMessageBox, QScrollArea, QWidget, QRadioButton,
-                               QButtonGroup)
-from PySide6.QtCore import Qt
+                               QListWidgetItem, QMessageBox, QListView, QAbstractItemView)
+from PySide6.QtCore import (Qt, QtMsgType, QObject, QTimer, Signal,
+                            QAbstractListModel, QModelIndex)
 from pathlib import Path
 
 from core.io_manager import global_io_manager
 import json
-from datetime import datetime
+import hashlib
+try:
+    import orjson  # 可选：更快的 JSON 解析/序列化
+except ImportError:
+    orjson = None
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
 # ⚠️ 重要：ChatWindow 延迟导入，避免在配置加载前读取 core.configs
 # from chat_window import ChatWindow  # ← 移到 main() 函数内部
-from modern_theme import BASIC_THEME_STYLE
+from modern_theme import BASIC_THEME_STYLE, PATH_SELECTOR_STYLE, FOLDER_INPUT_STYLE
 
 # ======================== 路径历史管理 ========================
 
+MAX_HISTORY = 50  # 路径历史最多保留条数，超出时淘汰最久未使用的
+
+# 时间戳格式：固定 14 位 YYYYMMDDHHMMSS，字典序即时间顺序，排序无需解析
+_STAMP_FORMAT = '%Y%m%d%H%M%S'
+
+def _now_stamp() -> str:
+    """当前时间的固定宽度时间戳"""
+    return datetime.now().strftime(_STAMP_FORMAT)
+
+def _parse_stamp(stamp: str) -> datetime:
+    """解析时间戳：固定 14 位格式按切片直接取整；旧版 ISO 格式回退 fromisoformat"""
+    if len(stamp) == 14 and stamp.isdigit():
+        return datetime(int(stamp[:4]), int(stamp[4:6]), int(stamp[6:8]),
+                        int(stamp[8:10]), int(stamp[10:12]), int(stamp[12:14]))
+    return datetime.fromisoformat(stamp)
+
+def _migrate_stamp(stamp: str) -> str:
+    """将旧版 ISO 时间字符串转换为固定宽度时间戳；无法解析时返回空字符串"""
+    if len(stamp) == 14 and stamp.isdigit():
+        return stamp
+    try:
+        return datetime.fromisoformat(stamp).strftime(_STAMP_FORMAT)
+    except Exception:
+        return ''
+
+def _json_loads(raw: bytes):
+    """解析 JSON 字节串：优先 orjson，未安装时回退标准库"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _json_dumps(obj) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON 字节串：优先 orjson，未安装时回退标准库（两者输出一致）"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+@lru_cache(maxsize=1)
 def get_appdata_config_dir() -> Path:
     """获取 AppData 配置目录路径"""
     appdata_local = os.environ.get('LOCALAPPDATA')
@@ -25,76 +71,197 @@ def get_appdata_config_dir() -> Path:
         appdata_local = Path.home() / 'AppData' / 'Local'
     return Path(appdata_local) / 'ChatChat'
 
+@lru_cache(maxsize=1)
 def get_filepath_config() -> Path:
     """获取路径配置文件完整路径"""
     return get_appdata_config_dir() / 'Filepath.json'
 
-def ensure_filepath_config() -> None:
-    """确保配置文件存在，不存在则创建空配置"""
-    config_path = get_filepath_config()
-    config_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    if not config_path.exists():
-        # 创建空配置文件（包含基本结构）
-        default_config = {
-            "version": "1.0",
-            "paths": []  # 每个元素格式：{"path": "...", "last_used": "2025-11-11T10:30:00", "added": "..."}
-        }
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=2, ensure_ascii=False)
-
-def load_path_history() -> list[dict]:
-    """读取路径历史记录"""
-    config_path = get_filepath_config()
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('paths', [])
-    except Exception:
-        return []
 
-def save_path_to_history(folder_path: str) -> None:
-    """保存路径到历史记录（如已存在则更新最后使用时间）"""
-    config_path = get_filepath_config()
+class PathHistoryStore:
+    """
+    路径历史的读写会话：进入时读取一次 Filepath.json，退出时统一写回一次
+    
+    文件中 paths 是以路径为键的字典（旧版为列表，读取时自动迁移），
+    键顺序即最后使用时间的升序：更新时把条目移到末尾，淘汰时从开头删除，均为 O(1)。
+    
+    文件以紧凑 JSON（无缩进、无多余空格）写入，不面向手工编辑；需要查看时可用任意 JSON 工具格式化。
+    
+    ⚠️ 仍使用 Filepath.json 而非 QSettings：每次启动只读一次、内容无变化不写、写入为原子替换，
+    已无额外开销；保留独立的 JSON 文件便于迁移/备份历史，也避免 Windows 下写入注册表。
+    
+    用法：
+        with PathHistoryStore() as store:
+            history = store.list()
+            ...
+            store.upsert(selected_path)
+    """
+    
+    def __init__(self, config_path: Path | None = None):
+        self.config_path = config_path or get_filepath_config()
+        self._data: dict = {"version": "2.0", "paths": {}}
+        self._dirty = False
+        self._digest: bytes | None = None  # 读入时文件内容的摘要，用于跳过无变化的写回
     
+    def __enter__(self) -> "PathHistoryStore":
+        try:
+            with open(self.config_path, 'rb') as f:
+                raw = f.read()
+            self._digest = self._hash(raw)
+            data = _json_loads(raw)
+            if isinstance(data, dict) and isinstance(data.get('paths'), (list, dict)):
+                self._data = data
+        except Exception:
+            pass  # 文件不存在或损坏：使用空配置，退出时按需写回
+        
+        paths = self._data['paths']
+        items = []
+        for item in (paths.values() if isinstance(paths, dict) else paths):
+            # 跳过损坏的条目：非字典或缺少字符串路径（None 等非字符串键无法序列化，会导致历史再也无法保存）
+            if not isinstance(item, dict) or not isinstance(item.get('path'), str) or not item['path']:
+                self._dirty = True
+                continue
+            
+            # 旧版 ISO 时间字符串迁移为固定宽度时间戳（保证字典序与时间顺序一致）；非字符串值视为未知时间
+            for key in ('last_used', 'added'):
+                value = item.get(key, '')
+                migrated = _migrate_stamp(value) if isinstance(value, str) else ''
+                if migrated != value:
+                    item[key] = migrated
+                    self._dirty = True
+            items.append(item)
+        
+        # 按最后使用时间升序重建字典（已有序时排序为线性开销）；旧版列表格式在此迁移
+        items.sort(key=lambda x: x.get('last_used', ''))
+        self._data['paths'] = {item['path']: item for item in items}
+        if not isinstance(paths, dict):
+            self._data['version'] = "2.0"
+            self._dirty = True  # 迁移后的格式在本次会话结束时写回
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if self._dirty and exc_type is None:
+            self.flush()
+        return False
+    
+    def list(self) -> list[dict]:
+        """返回路径历史列表（最近使用的在前）"""
+        return list(reversed(self._data['paths'].values()))
+    
+    def upsert(self, folder_path: str) -> None:
+        """在内存中新增路径或更新其最后使用时间，写盘推迟到退出会话时"""
+        now = _now_stamp()
+        paths = self._data['paths']
+        existing = paths.pop(folder_path, None)
+        
+        if existing:
+            # 更新最后使用时间，重新插入到末尾（保持升序）
+            existing['last_used'] = now
+            paths[folder_path] = existing
+        else:
+            # 添加新路径
+            paths[folder_path] = {
+                'path': folder_path,
+                'added': now,
+                'last_used': now
+            }
+            
+            # 超出上限：淘汰最久未使用的（字典开头）
+            while len(paths) > MAX_HISTORY:
+                del paths[next(iter(paths))]
+        
+        self._dirty = True
+    
+    @staticmethod
+    def _hash(raw: bytes) -> bytes:
+        """计算文件内容摘要"""
+        return hashlib.blake2b(raw, digest_size=8).digest()
+    
+    def flush(self) -> None:
+        """
+        将内存中的历史一次性写回文件
+        - 序列化结果与读入时完全一致则跳过写盘
+        - 先写临时文件并 fsync，再 os.replace 原子替换，避免写到一半崩溃导致配置损坏
+        """
+        raw = _json_dumps(self._data)
+        digest = self._hash(raw)
+        if digest == self._digest:
+            self._dirty = False
+            return
+        
+        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.config_path.with_name(self.config_path.name + '.tmp')
+        with open(tmp_path, 'wb', buffering=8192) as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.config_path)
+        self._digest = digest
+        self._dirty = False
+
+# ======================== GUI 对话框 ========================
+
+@lru_cache(maxsize=128)
+def _fmt_stamp(last_used: str) -> str:
+    """格式化显示时间（时间戳 -> 'YYYY-MM-DD HH:MM'），结果按字符串缓存"""
+    if len(last_used) == 14 and last_used.isdigit():
+        # 固定宽度格式：直接切片拼接，无需解析
+        return f"{last_used[:4]}-{last_used[4:6]}-{last_used[6:8]} {last_used[8:10]}:{last_used[10:12]}"
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        return datetime.fromisoformat(last_used).strftime('%Y-%m-%d %H:%M')
     except Exception:
-        data = {"version": "1.0", "paths": []}
-    
-    paths = data.get('paths', [])
-    now = datetime.now().isoformat()
-    
-    # 检查路径是否已存在
-    existing = None
-    for item in paths:
-        if item.get('path') == folder_path:
-            existing = item
-            break
-    
-    if existing:
-        # 更新最后使用时间
-        existing['last_used'] = now
-    else:
-        # 添加新路径
-        paths.append({
-            'path': folder_path,
-            'added': now,
-            'last_used': now
-        })
-    
-    data['paths'] = paths
-    
-    # 保存回文件
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+        return '未知时间'
+
+
+# 复用的文件夹选择器：首次使用时创建，之后每次浏览都复用同一个实例
+# 不挂到调用方对话框下，否则调用方销毁时会连带销毁它
+_FILE_DIALOG: QFileDialog | None = None
+
+def _choose_directory() -> str:
+    """打开文件夹选择器，返回选择的目录；取消时返回空字符串"""
+    global _FILE_DIALOG
+    if _FILE_DIALOG is None:
+        _FILE_DIALOG = QFileDialog()
+        _FILE_DIALOG.setWindowTitle("选择工作文件夹")
+        _FILE_DIALOG.setFileMode(QFileDialog.FileMode.Directory)
+        _FILE_DIALOG.setOption(QFileDialog.Option.ShowDirsOnly, True)
+        _FILE_DIALOG.setWindowModality(Qt.WindowModality.ApplicationModal)
+    _FILE_DIALOG.setDirectory(os.path.expanduser("~"))
+    if _FILE_DIALOG.exec():
+        selected = _FILE_DIALOG.selectedFiles()
+        if selected:
+            return selected[0]
+    return ""
+
+
+class PathHistoryModel(QAbstractListModel):
+    """路径历史列表模型：每行一条历史记录（显示文本 + PathRole 取原始路径）"""
+    
+    PathRole = Qt.ItemDataRole.UserRole + 1
+    
+    def __init__(self, path_history: list[dict], parent=None):
+        super().__init__(parent)
+        self._items = path_history
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            time_str = _fmt_stamp(item.get('last_used', ''))
+            return f"{item.get('path', '')}\n    (最后使用: {time_str})"
+        if role == self.PathRole or role == Qt.ItemDataRole.ToolTipRole:
+            return item.get('path', '')
+        return None
 
-# ======================== GUI 对话框 ========================
 
 class PathSelectorDialog(QDialog):
     """路径选择对话框：显示历史路径列表或添加新路径"""
     
+    _COMPACT_ROWS = 6  # 不超过该条数时列表必然放得下，不需要垂直滚动条
+    
     def __init__(self, path_history: list[dict], parent=None):
         super().__init__(parent)
         self.setWindowTitle("选择工作路径")
@@ -104,62 +271,8 @@ class PathSelectorDialog(QDialog):
         self.selected_path = None
         self.path_history = path_history
         
-        # 应用黑底白字样式
-        dialog_style = """
-            QDialog {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-            QLabel {
-                color: #ffffff;
-                font-size: 14px;
-                margin: 8px 0;
-            }
-            QPushButton {
-                background-color: #404040;
-                color: #ffffff;
-                border: 1px solid #606060;
-                padding: 10px 20px;
-                font-size: 14px;
-                border-radius: 4px;
-                min-width: 100px;
-            }
-            QPushButton:hover {
-                background-color: #505050;
-            }
-            QPushButton:pressed {
-                background-color: #303030;
-            }
-            QRadioButton {
-                color: #ffffff;
-                font-size: 13px;
-                padding: 8px;
-                spacing: 8px;
-            }
-            QRadioButton::indicator {
-                width: 18px;
-                height: 18px;
-            }
-            QRadioButton::indicator:unchecked {
-                background-color: #1a1a1a;
-                border: 2px solid #606060;
-                border-radius: 9px;
-            }
-            QRadioButton::indicator:checked {
-                background-color: #4a9eff;
-                border: 2px solid #4a9eff;
-                border-radius: 9px;
-            }
-            QScrollArea {
-                background-color: #1a1a1a;
-                border: 1px solid #606060;
-                border-radius: 4px;
-            }
-            QWidget#scrollContent {
-                background-color: #1a1a1a;
-            }
-        """
-        self.setStyleSheet(dialog_style)
+        # 黑底白字样式由应用级样式表（PATH_SELECTOR_STYLE）按 objectName 匹配，无需逐实例解析
+        self.setObjectName("PathSelector")
         
         self._setup_ui()
     
@@ -173,56 +286,32 @@ class PathSelectorDialog(QDialog):
         title_label.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 5px;")
         layout.addWidget(title_label)
         
-        # 滚动区域（显示历史路径）
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setMinimumHeight(300)
-        
-        scroll_content = QWidget()
-        scroll_content.setObjectName("scrollContent")
-        scroll_layout = QVBoxLayout(scroll_content)
-        scroll_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        scroll_layout.setSpacing(5)
-        
-        # 单选按钮组
-        self.button_group = QButtonGroup(self)
-        
+        self.list_view = None
         if self.path_history:
-            # 按最后使用时间排序（最近使用的在前）
-            sorted_paths = sorted(
-                self.path_history,
-                key=lambda x: x.get('last_used', ''),
-                reverse=True
-            )
+            # 历史列表（模型/视图：不为每条记录创建控件，单选语义由当前行提供）
+            # 历史已按最后使用时间降序排列，无需再排序
+            self.list_view = QListView()
+            self.list_view.setMinimumHeight(300)
+            self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+            self.list_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.list_view.setUniformItemSizes(True)
+            # 长路径中间省略（完整路径见悬停提示），不需要水平滚动条及其尺寸计算
+            self.list_view.setTextElideMode(Qt.TextElideMode.ElideMiddle)
+            self.list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+            if len(self.path_history) <= self._COMPACT_ROWS:
+                self.list_view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+            self.list_view.setModel(PathHistoryModel(self.path_history, self.list_view))
             
-            for idx, item in enumerate(sorted_paths):
-                path_str = item.get('path', '')
-                last_used = item.get('last_used', '')
-                
-                # 格式化显示时间
-                try:
-                    dt = datetime.fromisoformat(last_used)
-                    time_str = dt.strftime('%Y-%m-%d %H:%M')
-                except Exception:
-                    time_str = '未知时间'
-                
-                radio = QRadioButton(f"{path_str}\n    (最后使用: {time_str})")
-                radio.setProperty("path", path_str)
-                self.button_group.addButton(radio, idx)
-                scroll_layout.addWidget(radio)
-                
-                # 默认选中第一个（最近使用的）
-                if idx == 0:
-                    radio.setChecked(True)
+            # 默认选中第一个（最近使用的）
+            self.list_view.setCurrentIndex(self.list_view.model().index(0))
+            self.list_view.doubleClicked.connect(self._on_confirm)
+            layout.addWidget(self.list_view)
         else:
             # 无历史记录提示
             no_history_label = QLabel("暂无历史路径，请添加新路径")
             no_history_label.setStyleSheet("color: #999999; font-style: italic; padding: 20px;")
             no_history_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            scroll_layout.addWidget(no_history_label)
-        
-        scroll_area.setWidget(scroll_content)
-        layout.addWidget(scroll_area)
+            layout.addWidget(no_history_label)
         
         # 按钮区域
         button_layout = QHBoxLayout()
@@ -248,21 +337,19 @@ class PathSelectorDialog(QDialog):
     
     def _on_add_new_path(self):
         """添加新路径：打开文件夹选择器"""
-        folder_path = QFileDialog.getExistingDirectory(
-            self, 
-            "选择工作文件夹", 
-            os.path.expanduser("~")
-        )
+        folder_path = _choose_directory()
         
         if folder_path:
             self.selected_path = folder_path
             self.accept()
     
     def _on_confirm(self):
-        """确认选择：获取选中的单选按钮对应的路径"""
-        checked_button = self.button_group.checkedButton()
-        if checked_button:
-            self.selected_path = checked_button.property("path")
+        """确认选择：获取当前选中行对应的路径"""
+        if self.list_view is None:
+            return
+        index = self.list_view.currentIndex()
+        if index.isValid():
+            self.selected_path = index.data(PathHistoryModel.PathRole)
             self.accept()
     
     def get_selected_path(self) -> str | None:
@@ -279,43 +366,8 @@ class FolderInputDialog(QDialog):
         self.setModal(True)
         self.resize(550, 160)
         
-        # 黑底白字样式
-        dialog_style = """
-            QDialog {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-            QLabel {
-                color: #ffffff;
-                font-size: 14px;
-                margin: 8px 0;
-            }
-            QLineEdit {
-                background-color: #000000;
-                color: #ffffff;
-                border: 1px solid #606060;
-                border-radius: 4px;
-                padding: 8px;
-                font-size: 13px;
-                font-family: 'Consolas', 'Monaco', monospace;
-            }
-            QPushButton {
-                background-color: #404040;
-                color: #ffffff;
-                border: 1px solid #606060;
-                padding: 8px 16px;
-                font-size: 14px;
-                border-radius: 4px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background-color: #505050;
-            }
-            QPushButton:pressed {
-                background-color: #303030;
-            }
-        """
-        self.setStyleSheet(dialog_style)
+        # 黑底白字样式由应用级样式表（FOLDER_INPUT_STYLE）按 objectName 匹配，无需逐实例解析
+        self.setObjectName("FolderInput")
         
         self.input_edit = QLineEdit()
         self.input_edit.setPlaceholderText("输入或选择文件夹路径")
@@ -345,11 +397,7 @@ class FolderInputDialog(QDialog):
     
     def _on_browse_clicked(self):
         """浏览文件夹"""
-        directory = QFileDialog.getExistingDirectory(
-            self, 
-            "选择工作文件夹", 
-            os.path.expanduser("~")
-        )
+        directory = _choose_directory()
         if directory:
             self.input_edit.setText(directory)
     
@@ -370,55 +418,92 @@ class FolderInputDialog(QDialog):
 
 # ======================== 启动路径选择逻辑 ========================
 
-def prompt_workspace_path(app: QApplication) -> str | None:
+def _force_path_picker(app: QApplication) -> bool:
+    """是否强制显示路径选择界面：命令行带 --force-path-picker，或启动时按住 Shift"""
+    if "--force-path-picker" in app.arguments():
+        return True
+    return bool(app.queryKeyboardModifiers() & Qt.KeyboardModifier.ShiftModifier)
+
+def _recent_single_path(path_history: list[dict], within: timedelta) -> str | None:
+    """历史中只有一条且在 within 时间内使用过时返回该路径，否则返回 None"""
+    if len(path_history) != 1:
+        return None
+    item = path_history[0]
+    try:
+        last_used = _parse_stamp(item.get('last_used', ''))
+    except Exception:
+        return None
+    if datetime.now() - last_used < within:
+        return item.get('path') or None
+    return None
+
+def prompt_workspace_path(app: QApplication,
+                          auto_select_if_recent: timedelta = timedelta(hours=24)) -> str | None:
     """
     启动时的路径选择流程：
-    1. 确保配置文件存在
+    1. 打开路径历史会话（只读一次配置文件）
     2. 读取历史路径
     3. 如果有历史，显示选择界面；否则直接进入文件夹选择
+       （历史仅一条且在 auto_select_if_recent 内使用过时直接沿用，不弹界面；
+        命令行 --force-path-picker 或启动时按住 Shift 可强制弹出）
     4. 保存选择的路径到历史
     
     返回：
     - str: 用户选择的路径
     - None: 用户取消
     """
-    # 1. 确保配置文件存在
-    ensure_filepath_config()
-    
-    # 2. 读取历史路径
-    path_history = load_path_history()
-    
-    selected_path = None
-    
-    # 3. 显示路径选择界面
-    if path_history:
-        # 有历史记录：显示选择界面
-        selector = PathSelectorDialog(path_history)
-        result = selector.exec()
+    # 1. 打开会话：配置文件不存在时按空历史处理，写回时自动创建目录与文件
+    with PathHistoryStore() as store:
+        # 2. 读取历史路径
+        path_history = store.list()
         
-        if result == QDialog.DialogCode.Accepted:
-            selected_path = selector.get_selected_path()
-        else:
-            return None  # 用户取消
-    else:
-        # 无历史记录：直接进入文件夹选择
-        folder_dialog = FolderInputDialog()
-        result = folder_dialog.exec()
+        selected_path = None
+        if not _force_path_picker(app):
+            selected_path = _recent_single_path(path_history, auto_select_if_recent)
         
-        if result == QDialog.DialogCode.Accepted:
-            selected_path = folder_dialog.get_path()
+        # 3. 显示路径选择界面
+        if selected_path:
+            pass  # 唯一且近期使用过的路径：直接沿用
+        elif path_history:
+            # 有历史记录：显示选择界面
+            selector = PathSelectorDialog(path_history)
+            result = selector.exec()
+            
+            if result == QDialog.DialogCode.Accepted:
+                selected_path = selector.get_selected_path()
+            else:
+                return None  # 用户取消
         else:
-            return None  # 用户取消
-    
-    # 4. 保存到历史记录
-    if selected_path:
-        save_path_to_history(selected_path)
+            # 无历史记录：直接进入文件夹选择
+            folder_dialog = FolderInputDialog()
+            result = folder_dialog.exec()
+            
+            if result == QDialog.DialogCode.Accepted:
+                selected_path = folder_dialog.get_path()
+            else:
+                return None  # 用户取消
+        
+        # 4. 保存到历史记录
+        if selected_path:
+            store.upsert(selected_path)
     
     return selected_path
 
 
 # ======================== 原有代码部分 ========================
 
+# 核心配置 JSON 必需的顶层键
+_CORE_CONFIG_KEYS = frozenset({
+    "LENGTH_LIMIT",
+    "USER_NAME",
+    "CHAT_METHOD",
+    "MEMORY_DEPTH",
+    "JUDGER_MEMORY_DEPTH",
+    "DEFAULT_OPENING",
+    "API_PROVIDERS",
+    "DEFAULT_WORKFLOW_CONFIG",
+})
+
 def load_and_apply_core_configs(config_path: str = "core_configs.json") -> None:
     """
     读取并应用核心全局配置（在进入 GUI 前执行）
@@ -433,25 +518,16 @@ def load_and_apply_core_configs(config_path: str = "core_configs.json") -> None:
         # JSON 不存在：直接使用默认配置
         return
 
-    raw = global_io_manager.read_json(config_path)
-    conf = json.loads(raw)
-
-    required_keys = {
-        "LENGTH_LIMIT",
-        "USER_NAME",
-        "CHAT_METHOD",
-        "MEMORY_DEPTH",
-        "JUDGER_MEMORY_DEPTH",
-        "DEFAULT_OPENING",
-        "API_PROVIDERS",
-        "DEFAULT_WORKFLOW_CONFIG",
-    }
-    missing = required_keys - set(conf.keys())
+    conf = global_io_manager.read_json_object(config_path)
+
+    required_keys = _CORE_CONFIG_KEYS
+    missing = required_keys - conf.keys()
     if missing:
         raise KeyError(f"核心配置 JSON 缺少必需键：{missing}")
 
     def is_empty(val):
-        return val is None or (isinstance(val, str) and val.strip() == "") or (isinstance(val, (list, dict)) and len(val) == 0)
+        # 注意：不能直接用 not val，数值 0 / False 是有效配置
+        return val is None or (isinstance(val, str) and not val.strip()) or (isinstance(val, (list, dict)) and not val)
 
     # 逐项应用覆盖
     for key in required_keys:
@@ -489,7 +565,8 @@ class ChatApp(QMainWindow):
 def main():
     app = RobustApplication(sys.argv)
     install_global_handlers(app)
-    app.setStyleSheet(BASIC_THEME_STYLE)
+    # 对话框样式随全局样式一起设置，整个进程只解析一次
+    app.setStyleSheet(BASIC_THEME_STYLE + "\n" + PATH_SELECTOR_STYLE + "\n" + FOLDER_INPUT_STYLE)
 
     # 1️⃣ 启动路径选择流程（取消则退出）
     workspace_path = prompt_workspace_path(app)
@@ -524,7 +601,14 @@ def main():
 
     app.aboutToQuit.connect(_shutdown)
 
-    return app.exec()
+    # 事件循环真正开始后才切换为合并弹窗；启动前（如配置加载失败）与退出后的异常同步弹窗
+    if _ERROR_REPORTER is not None:
+        QTimer.singleShot(0, _ERROR_REPORTER.arm)
+    try:
+        return app.exec()
+    finally:
+        if _ERROR_REPORTER is not None:
+            _ERROR_REPORTER.disarm()
 
 class RobustApplication(QApplication):
     """QApplication 子类：兜底捕获 Qt 事件循环中的未处理异常，写日志并提示用户。"""
@@ -533,20 +617,12 @@ class RobustApplication(QApplication):
         try:
             return super().notify(receiver, event)
         except Exception as e:
-            import traceback
-            from pathlib import Path
             msg = f"Unhandled exception in Qt event loop: {type(e).__name__}: {e}\n{traceback.format_exc()}"
             try:
-                log_dir = _resolve_log_dir()
-                log_dir.mkdir(parents=True, exist_ok=True)
-                with open(log_dir / "crash.log", "a", encoding="utf-8") as f:
-                    f.write(msg + "\n")
-            except Exception:
-                pass
-            try:
-                QMessageBox.critical(None, "ChatChat 错误", msg)
+                _write_crash_log(msg + "\n")
             except Exception:
                 pass
+            _report_error(msg)
             return False
 
 def _resolve_runtime_base() -> Path:
@@ -557,65 +633,202 @@ def _resolve_runtime_base() -> Path:
         return Path(sys.executable).resolve().parent
     return Path(__file__).resolve().parent.parent
 
+@lru_cache(maxsize=1)
 def _resolve_log_dir() -> Path:
     """返回日志目录路径：统一写入 logs/ 下，便于无控制台模式排查。"""
-    # ✨ 改进：日志也写入 AppData
-    appdata_local = os.environ.get('LOCALAPPDATA')
-    if not appdata_local:
-        appdata_local = Path.home() / 'AppData' / 'Local'
-    log_dir = Path(appdata_local) / 'ChatChat' / 'logs'
-    return log_dir
+    # ✨ 改进：日志也写入 AppData（与路径配置共用同一缓存的目录）
+    return get_appdata_config_dir() / 'logs'
+
+# 常驻日志句柄（64KB 缓冲）：避免每条异常/Qt 消息都 open+write+close
+_LOG_BUFFER_SIZE = 64 * 1024
+_CRASH_LOG = None
+_QT_LOG = None
+_FAULT_LOG = None
+_LOG_DIR: Path | None = None  # 已确认存在的日志目录（只 mkdir 一次）
+
+def _ensure_log_dir() -> Path:
+    """返回日志目录，首次调用时创建；之后不再重复检查"""
+    global _LOG_DIR
+    if _LOG_DIR is None:
+        log_dir = _resolve_log_dir()
+        log_dir.mkdir(parents=True, exist_ok=True)
+        _LOG_DIR = log_dir
+    return _LOG_DIR
+
+def _open_log(name: str):
+    """以追加模式打开日志目录下的日志文件（带大缓冲）"""
+    return open(_ensure_log_dir() / name, "a", encoding="utf-8", buffering=_LOG_BUFFER_SIZE)
+
+def _write_crash_log(text: str) -> None:
+    """写入 crash.log 并立即刷新（崩溃信息不能留在缓冲区里）"""
+    global _CRASH_LOG
+    if _CRASH_LOG is None:
+        _CRASH_LOG = _open_log("crash.log")
+    _CRASH_LOG.write(text)
+    _CRASH_LOG.flush()
+
+def _flush_logs() -> None:
+    """刷新所有常驻日志句柄（退出前调用；faulthandler.log 无缓冲，无需刷新）"""
+    for f in (_CRASH_LOG, _QT_LOG):
+        if f is not None and not f.closed:
+            try:
+                f.flush()
+            except Exception:
+                pass
+
+def _close_logs() -> None:
+    """关闭所有常驻日志句柄（atexit 时调用）"""
+    for f in (_CRASH_LOG, _QT_LOG):
+        if f is not None and not f.closed:
+            try:
+                f.close()
+            except Exception:
+                pass
+    
+    # faulthandler 仍持有该文件描述符：必须先停用再关闭，
+    # 否则退出阶段的原生崩溃会写入已关闭（或被复用）的描述符
+    if _FAULT_LOG is not None and not _FAULT_LOG.closed:
+        try:
+            import faulthandler
+            faulthandler.disable()
+            _FAULT_LOG.close()
+        except Exception:
+            pass
+
+# Qt 消息级别名称（模块级常量，避免每条消息重建字典）
+_QT_MSG_LEVELS = {
+    QtMsgType.QtDebugMsg: "DEBUG",
+    QtMsgType.QtInfoMsg: "INFO",
+    QtMsgType.QtWarningMsg: "WARNING",
+    QtMsgType.QtCriticalMsg: "CRITICAL",
+    QtMsgType.QtFatalMsg: "FATAL",
+}
+_QT_QUIET_LEVELS = (QtMsgType.QtDebugMsg, QtMsgType.QtInfoMsg)
+
+class _ErrorReporter(QObject):
+    """
+    异常弹窗合并器：短时间内的多条异常合并为一个对话框
+    - 异常风暴（如定时器每次触发都抛异常）时不会连续弹出大量模态框
+    - 对话框显示期间到达的异常继续排队，避免 exec() 内部事件循环导致 notify 递归弹窗
+    - post() 可在任意线程调用：信号跨线程时自动排队到主线程处理
+    - 合并依赖定时器，只在主事件循环运行期间生效（armed）；循环启动前/结束后由 _report_error 同步弹窗
+    """
+    _COALESCE_MS = 500
+    _MAX_PENDING = 10
+    
+    posted = Signal()
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = deque(maxlen=self._MAX_PENDING)
+        self._showing = False
+        self.armed = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self._COALESCE_MS)
+        self._timer.timeout.connect(self._show_pending)
+        self.posted.connect(self._timer.start)
+    
+    def arm(self) -> None:
+        """主事件循环已开始运行：此后的异常改为合并弹窗"""
+        self.armed = True
+    
+    def disarm(self) -> None:
+        """主事件循环已结束：停止合并，并把尚未显示的异常同步弹出"""
+        self.armed = False
+        self._timer.stop()
+        self._show_pending()
+    
+    def post(self, msg: str) -> None:
+        """登记一条异常信息，并（重新）开始合并计时"""
+        self._pending.append(msg)
+        self.posted.emit()
+    
+    def _show_pending(self) -> None:
+        """计时结束：把积累的异常合并成一个对话框显示"""
+        if not self._pending:
+            return
+        if self._showing:
+            self._timer.start()  # 上一个对话框还没关，稍后再显示
+            return
+        text = "\n---\n".join(self._pending)
+        self._pending.clear()
+        self._showing = True
+        try:
+            QMessageBox.critical(QApplication.activeWindow(), "ChatChat 错误", text)
+        except Exception:
+            pass
+        finally:
+            self._showing = False
+
+_ERROR_REPORTER: _ErrorReporter | None = None
+
+def _report_error(msg: str) -> None:
+    """向用户提示异常：主事件循环运行中走合并器，否则直接同步弹窗（定时器不会触发，排队的异常将永远不显示）"""
+    try:
+        if _ERROR_REPORTER is not None and _ERROR_REPORTER.armed:
+            _ERROR_REPORTER.post(msg)
+        else:
+            QMessageBox.critical(None, "ChatChat 错误", msg)
+    except Exception:
+        pass
+
+def _enable_faulthandler() -> None:
+    """启用 faulthandler，将原生崩溃堆栈写入 faulthandler.log"""
+    global _FAULT_LOG
+    try:
+        import faulthandler
+        # faulthandler 直接写文件描述符，用无缓冲的二进制句柄即可；保留全局引用防止句柄被回收
+        _FAULT_LOG = open(_ensure_log_dir() / "faulthandler.log", "ab", buffering=0)
+        faulthandler.enable(file=_FAULT_LOG, all_threads=True)
+    except Exception:
+        pass
 
 def install_global_handlers(app: QApplication) -> None:
     """安装全局异常与 Qt 消息处理器：捕获主线程/子线程异常与 Qt 警告，写入日志并提示。"""
-    import sys, threading, traceback
-    from PySide6.QtCore import qInstallMessageHandler, QtMsgType
-    # 确保日志目录存在
-    log_dir = _resolve_log_dir()
-    log_dir.mkdir(parents=True, exist_ok=True)
+    import threading, atexit
+    from PySide6.QtCore import qInstallMessageHandler
+    global _CRASH_LOG, _QT_LOG, _ERROR_REPORTER
+    # 确保日志目录存在（仅此一次），并一次性打开常驻日志句柄
+    _ensure_log_dir()
+    if _CRASH_LOG is None:
+        _CRASH_LOG = _open_log("crash.log")
+    _QT_LOG = _open_log("qt.log")
+    atexit.register(_close_logs)
+    app.aboutToQuit.connect(_flush_logs)
+    _ERROR_REPORTER = _ErrorReporter(app)
 
     # 捕获未处理的 Python 异常
     def excepthook(exc_type, exc, tb):
         msg = "".join(traceback.format_exception(exc_type, exc, tb))
-        with open(log_dir / "crash.log", "a", encoding="utf-8") as f:
-            f.write("Unhandled exception (sys.excepthook):\n" + msg + "\n")
-        try:
-            QMessageBox.critical(app.activeWindow() or None, "ChatChat 错误", msg)
-        except Exception:
-            pass
+        _write_crash_log("Unhandled exception (sys.excepthook):\n" + msg + "\n")
+        _report_error(msg)
     sys.excepthook = excepthook
 
     # 捕获非 QThread 的 Python 线程异常
     def threading_excepthook(args: threading.ExceptHookArgs):
         msg = "".join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback))
-        with open(log_dir / "crash.log", "a", encoding="utf-8") as f:
-            f.write("Unhandled exception (threading.excepthook):\n" + msg + "\n")
-        try:
-            QMessageBox.critical(app.activeWindow() or None, "ChatChat 错误", msg)
-        except Exception:
-            pass
+        _write_crash_log("Unhandled exception (threading.excepthook):\n" + msg + "\n")
+        _report_error(msg)
     threading.excepthook = threading_excepthook
 
-    # 启用 faulthandler，尽量抓取原生崩溃
-    try:
-        import faulthandler
-        fh_file = open(log_dir / "faulthandler.log", "a", encoding="utf-8")
-        faulthandler.enable(file=fh_file, all_threads=True)
-    except Exception:
-        pass
+    # 启用 faulthandler，尽量抓取原生崩溃（CHATCHAT_FAULTHANDLER=0 时跳过，如 CI/批处理）
+    if os.environ.get('CHATCHAT_FAULTHANDLER', '1') == '1':
+        _enable_faulthandler()
 
-    # 捕获 Qt 消息（警告/致命）
+    # 捕获 Qt 消息（警告/致命）；调试/信息类消息默认直接丢弃，设置 CHATCHAT_QT_VERBOSE 时才记录
+    qt_verbose = bool(os.environ.get('CHATCHAT_QT_VERBOSE'))
+    qt_log = _QT_LOG
     def qt_message_handler(mode, context, message):
-        level = {
-            QtMsgType.QtDebugMsg: "DEBUG",
-            QtMsgType.QtInfoMsg: "INFO",
-            QtMsgType.QtWarningMsg: "WARNING",
-            QtMsgType.QtCriticalMsg: "CRITICAL",
-            QtMsgType.QtFatalMsg: "FATAL",
-        }.get(mode, str(mode))
-        line = f"[{level}] {context.file}:{context.line} {context.function}: {message}\n"
-        with open(log_dir / "qt.log", "a", encoding="utf-8") as f:
-            f.write(line)
+        quiet = mode in _QT_QUIET_LEVELS
+        if quiet and not qt_verbose:
+            return
+        level = _QT_MSG_LEVELS.get(mode, str(mode))
+        file, function = context.file, context.function
+        qt_log.write(f"[{level}] {file}:{context.line} {function}: {message}\n")
+        # 调试/信息类消息留在缓冲区批量落盘；警告及以上立即刷新
+        if not quiet:
+            qt_log.flush()
     qInstallMessageHandler(qt_message_handler)
 
 if __name__ == '__main__':
@@ -13,4 +13,88 @@ QWidget {
     font-family: 'Microsoft YaHei';
     color: #ffffff;
 }
+"""
+
+# 路径选择对话框（objectName = PathSelector）- 黑底白字
+PATH_SELECTOR_STYLE = """
+QDialog#PathSelector {
+    background-color: #2b2b2b;
+    color: #ffffff;
+}
+QDialog#PathSelector QLabel {
+    color: #ffffff;
+    font-size: 14px;
+    margin: 8px 0;
+}
+QDialog#PathSelector QPushButton {
+    background-color: #404040;
+    color: #ffffff;
+    border: 1px solid #606060;
+    padding: 10px 20px;
+    font-size: 14px;
+    border-radius: 4px;
+    min-width: 100px;
+}
+QDialog#PathSelector QPushButton:hover {
+    background-color: #505050;
+}
+QDialog#PathSelector QPushButton:pressed {
+    background-color: #303030;
+}
+QDialog#PathSelector QListView {
+    background-color: #1a1a1a;
+    color: #ffffff;
+    border: 1px solid #606060;
+    border-radius: 4px;
+    font-size: 13px;
+    outline: none;
+}
+QDialog#PathSelector QListView::item {
+    padding: 8px;
+    border-radius: 4px;
+}
+QDialog#PathSelector QListView::item:hover {
+    background-color: #2f2f2f;
+}
+QDialog#PathSelector QListView::item:selected {
+    background-color: #4a9eff;
+    color: #ffffff;
+}
+"""
+
+# 文件夹输入对话框（objectName = FolderInput）- 黑底白字
+FOLDER_INPUT_STYLE = """
+QDialog#FolderInput {
+    background-color: #2b2b2b;
+    color: #ffffff;
+}
+QDialog#FolderInput QLabel {
+    color: #ffffff;
+    font-size: 14px;
+    margin: 8px 0;
+}
+QDialog#FolderInput QLineEdit {
+    background-color: #000000;
+    color: #ffffff;
+    border: 1px solid #606060;
+    border-radius: 4px;
+    padding: 8px;
+    font-size: 13px;
+    font-family: 'Consolas', 'Monaco', monospace;
+}
+QDialog#FolderInput QPushButton {
+    background-color: #404040;
+    color: #ffffff;
+    border: 1px solid #606060;
+    padding: 8px 16px;
+    font-size: 14px;
+    border-radius: 4px;
+    min-width: 80px;
+}
+QDialog#FolderInput QPushButton:hover {
+    background-color: #505050;
+}
+QDialog#FolderInput QPushButton:pressed {
+    background-color: #303030;
+}
 """
\ No newline at end of file